@@ -1,9 +1,10 @@
-from flask import Flask
+from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from app.config import config
+import importlib
 import os
 
 db = SQLAlchemy()
@@ -23,6 +24,12 @@ def create_app(config_name=None):
     jwt.init_app(app)
     CORS(app, origins=app.config['CORS_ORIGINS'])
     
+    # Per-route latency, SQL query and outbound call metrics at /metrics
+    from app.utils.metrics import metrics
+    metrics.init_app(app)
+    with app.app_context():
+        metrics.track_queries(db.engine)
+    
     # Create upload directories
     os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'reviews'), exist_ok=True)
     
@@ -33,6 +40,8 @@ def create_app(config_name=None):
     from app.routes.reviews import reviews_bp
     from app.routes.offers import offers_bp
     from app.routes.whatsapp import whatsapp_bp
+    from app.routes.uploads import uploads_bp
+    from app.routes.admin import admin_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(appointments_bp, url_prefix='/api/appointments')
@@ -40,9 +49,31 @@ def create_app(config_name=None):
     app.register_blueprint(reviews_bp, url_prefix='/api/reviews')
     app.register_blueprint(offers_bp, url_prefix='/api/offers')
     app.register_blueprint(whatsapp_bp, url_prefix='/api/whatsapp')
+    app.register_blueprint(uploads_bp, url_prefix='/api/uploads')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
     
-    # Initialize scheduler
-    with app.app_context():
-        from app.utils.scheduler import appointment_scheduler
+    # Delete stored images once no review_images row references them; importing
+    # the module registers its session listeners (a plain `import app.utils...`
+    # would rebind the local `app`)
+    importlib.import_module('app.utils.uploads')
+    
+    # Password hashing pool is full: ask the client to retry instead of queueing forever
+    from app.utils.passwords import PasswordHasherBusy
+    
+    @app.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(e):
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    
+    # Start the reminder scheduler (only the leader process fires reminders)
+    from app.utils.scheduler import appointment_scheduler
+    appointment_scheduler.init_app(app)
+    
+    # Start WhatsApp outbox delivery and inbound webhook workers
+    from app.utils.outbox import outbox_worker
+    from app.utils.inbound import inbound_worker
+    outbox_worker.start(app)
+    inbound_worker.start(app)
     
     return app
@@ -0,0 +1,41 @@
+from flask import Blueprint, request, jsonify, current_app
+from app.utils.analytics import business_analytics
+from app.utils.auth_helpers import admin_required
+from datetime import datetime, date, timedelta
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/analytics', methods=['GET'])
+@admin_required
+def get_analytics(current_user_id):
+    """Revenue, occupancy, cancellations and per-service trends.
+    
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive); defaults to the last
+    ANALYTICS_DEFAULT_DAYS days. Reports are cached for
+    ANALYTICS_CACHE_TTL_SECONDS.
+    """
+    try:
+        config = current_app.config
+        
+        to_param = request.args.get('to')
+        end = datetime.strptime(to_param, '%Y-%m-%d').date() if to_param else date.today()
+        
+        from_param = request.args.get('from')
+        if from_param:
+            start = datetime.strptime(from_param, '%Y-%m-%d').date()
+        else:
+            start = end - timedelta(days=config.get('ANALYTICS_DEFAULT_DAYS', 90) - 1)
+        
+        if end < start:
+            return jsonify({'error': 'to must not be before from'}), 400
+        
+        max_days = config.get('ANALYTICS_MAX_DAYS', 730)
+        if (end - start).days >= max_days:
+            return jsonify({'error': f'Range is limited to {max_days} days'}), 400
+        
+        return jsonify(business_analytics(start, end))
+        
+    except ValueError:
+        return jsonify({'error': 'from and to must be YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,14 +1,27 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy.exc import IntegrityError
 from app import db
 from app.models.appointment import Appointment
 from app.models.user import User
 from app.models.service import Service
 from app.utils.whatsapp import whatsapp_service
 from app.utils.scheduler import appointment_scheduler
+from app.utils.availability import slot_index, is_overlap_violation
+from app.utils.calendar_feed import calendar_payload
+from app.utils.pagination import wants_stream, wants_page, keyset_page, order_by_keyset, stream_ndjson
 from datetime import datetime, date, time
 
 appointments_bp = Blueprint('appointments', __name__)
 
+def integrity_error_response(error):
+    """409 when the database rejected an overlapping booking the slot index missed"""
+    db.session.rollback()
+    if is_overlap_violation(error):
+        # Another worker booked the slot first, so this process's index is stale
+        slot_index.invalidate()
+        return jsonify({'error': 'Time slot already booked'}), 409
+    return jsonify({'error': str(error)}), 500
+
 @appointments_bp.route('/', methods=['POST'])
 def create_appointment():
     """Create a new appointment with WhatsApp notifications"""
@@ -41,14 +54,8 @@ def create_appointment():
         appointment_date = datetime.strptime(data['appointment_date'], '%Y-%m-%d').date()
         appointment_time = datetime.strptime(data['appointment_time'], '%H:%M').time()
         
-        # Check for conflicts
-        existing = Appointment.query.filter_by(
-            appointment_date=appointment_date,
-            appointment_time=appointment_time,
-            status='upcoming'
-        ).first()
-        
-        if existing:
+        # Check for conflicts against the service duration
+        if slot_index.find_conflict(appointment_date, appointment_time, service.duration):
             return jsonify({'error': 'Time slot already booked'}), 409
         
         # Create appointment
@@ -61,47 +68,45 @@ def create_appointment():
         )
         
         db.session.add(appointment)
+        db.session.flush()
+        
+        # Queue WhatsApp notifications in the same transaction as the booking;
+        # the outbox workers deliver them after the response is sent
+        client_queued = whatsapp_service.send_booking_confirmation(
+            client_name=user.name,
+            client_phone=user.phone,
+            service_name=service.name,
+            appointment_date=appointment_date,
+            appointment_time=appointment_time,
+            duration=service.duration,
+            idempotency_key=f'appointment:{appointment.id}:confirmation'
+        )
+        
+        owner_queued = whatsapp_service.send_owner_notification(
+            client_name=user.name,
+            client_phone=user.phone,
+            service_name=service.name,
+            appointment_date=appointment_date,
+            appointment_time=appointment_time,
+            duration=service.duration,
+            idempotency_key=f'appointment:{appointment.id}:owner'
+        )
+        
         db.session.commit()
+        slot_index.add(appointment.id, appointment_date, appointment_time, service.duration)
         
-        # Send WhatsApp notifications
+        # Schedule reminder
         try:
-            # Send confirmation to client
-            client_success = whatsapp_service.send_booking_confirmation(
-                client_name=user.name,
-                client_phone=user.phone,
-                service_name=service.name,
-                appointment_date=appointment_date,
-                appointment_time=appointment_time,
-                duration=service.duration
-            )
-            
-            # Send notification to owner
-            owner_success = whatsapp_service.send_owner_notification(
-                client_name=user.name,
-                client_phone=user.phone,
-                service_name=service.name,
-                appointment_date=appointment_date,
-                appointment_time=appointment_time,
-                duration=service.duration
-            )
-            
-            # Schedule reminder
             reminder_scheduled = appointment_scheduler.schedule_reminder(appointment.id)
-            
-            notification_status = {
-                'client_notified': client_success,
-                'owner_notified': owner_success,
-                'reminder_scheduled': reminder_scheduled
-            }
-            
         except Exception as e:
-            print(f"WhatsApp notification error: {str(e)}")
-            notification_status = {
-                'client_notified': False,
-                'owner_notified': False,
-                'reminder_scheduled': False,
-                'error': str(e)
-            }
+            print(f"Reminder scheduling error: {str(e)}")
+            reminder_scheduled = False
+        
+        notification_status = {
+            'client_notified': client_queued,
+            'owner_notified': owner_queued,
+            'reminder_scheduled': reminder_scheduled
+        }
         
         return jsonify({
             'message': 'Appointment booked successfully!',
@@ -109,20 +114,25 @@ def create_appointment():
             'notifications': notification_status
         }), 201
         
+    except IntegrityError as e:
+        return integrity_error_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @appointments_bp.route('/', methods=['GET'])
 def get_appointments():
-    """Get appointments with optional filtering"""
+    """Get appointments with optional filtering.
+    
+    Pass ?limit=/&cursor= for keyset pages or ?format=ndjson to stream.
+    """
     try:
         # Query parameters
         date_filter = request.args.get('date')
         service_id = request.args.get('service_id')
         status = request.args.get('status', 'upcoming')
         
-        query = Appointment.query
+        query = Appointment.query_with_details()
         
         if date_filter:
             filter_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
@@ -134,13 +144,81 @@ def get_appointments():
         if status:
             query = query.filter(Appointment.status == status)
         
-        appointments = query.order_by(
-            Appointment.appointment_date.asc(),
-            Appointment.appointment_time.asc()
-        ).all()
+        keyset = [Appointment.appointment_date, Appointment.appointment_time, Appointment.id]
+        
+        if wants_stream():
+            return stream_ndjson(order_by_keyset(query, keyset), Appointment.to_dict)
+        
+        if wants_page():
+            appointments, next_cursor = keyset_page(query, keyset)
+            return jsonify({
+                'appointments': [appointment.to_dict() for appointment in appointments],
+                'next_cursor': next_cursor
+            })
+        
+        appointments = order_by_keyset(query, keyset).all()
         
         return jsonify([appointment.to_dict() for appointment in appointments])
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@appointments_bp.route('/availability', methods=['GET'])
+def get_availability():
+    """Get free start times for a service on a given date"""
+    try:
+        date_param = request.args.get('date')
+        service_id = request.args.get('service_id')
+        
+        if not date_param or not service_id:
+            return jsonify({'error': 'date and service_id are required'}), 400
+        
+        service = Service.query.get(service_id)
+        if not service:
+            return jsonify({'error': 'Service not found'}), 404
+        
+        day = datetime.strptime(date_param, '%Y-%m-%d').date()
+        
+        return jsonify({
+            'date': day.isoformat(),
+            'service_id': service.id,
+            'duration': service.duration,
+            'slots': slot_index.free_slots(day, service.duration)
+        })
+        
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@appointments_bp.route('/calendar', methods=['GET'])
+def get_calendar():
+    """Appointments for a day/week view as a columnar payload.
+    
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive, to defaults to from),
+    optional ?status=. appointments.start is minutes from `from` at 00:00;
+    appointments.user/.service/.status index into the lookup tables.
+    """
+    try:
+        from_param = request.args.get('from')
+        if not from_param:
+            return jsonify({'error': 'from is required'}), 400
+        
+        start = datetime.strptime(from_param, '%Y-%m-%d').date()
+        end = datetime.strptime(request.args.get('to', from_param), '%Y-%m-%d').date()
+        if end < start:
+            return jsonify({'error': 'to must not be before from'}), 400
+        
+        max_days = current_app.config.get('CALENDAR_MAX_DAYS', 62)
+        if (end - start).days >= max_days:
+            return jsonify({'error': f'Range is limited to {max_days} days'}), 400
+        
+        return jsonify(calendar_payload(start, end, request.args.get('status')))
+        
+    except ValueError:
+        return jsonify({'error': 'from and to must be YYYY-MM-DD'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -153,26 +231,48 @@ def update_appointment_status(appointment_id):
         old_status = appointment.status
         
         if data.get('status') in ['upcoming', 'completed', 'cancelled']:
+            if data['status'] == 'upcoming' and old_status != 'upcoming':
+                if slot_index.find_conflict(
+                    appointment.appointment_date,
+                    appointment.appointment_time,
+                    appointment.service.duration,
+                    ignore_id=appointment_id
+                ):
+                    return jsonify({'error': 'Time slot already booked'}), 409
+            
             appointment.status = data['status']
+            cancelled = data['status'] == 'cancelled' and old_status != 'cancelled'
+            
+            # Queue the cancellation notice in the same transaction as the status change
+            if cancelled:
+                whatsapp_service.send_appointment_cancellation(
+                    client_name=appointment.user.name,
+                    client_phone=appointment.user.phone,
+                    service_name=appointment.service.name,
+                    appointment_date=appointment.appointment_date,
+                    appointment_time=appointment.appointment_time,
+                    reason=data.get('reason', ''),
+                    idempotency_key=(
+                        f'appointment:{appointment_id}:cancellation:'
+                        f'{appointment.appointment_date.isoformat()}T{appointment.appointment_time.strftime("%H:%M")}'
+                    )
+                )
+            
             db.session.commit()
             
+            if data['status'] == 'upcoming':
+                slot_index.add(
+                    appointment_id,
+                    appointment.appointment_date,
+                    appointment.appointment_time,
+                    appointment.service.duration
+                )
+            else:
+                slot_index.remove(appointment_id)
+            
             # Handle status-specific actions
-            if data['status'] == 'cancelled' and old_status != 'cancelled':
-                # Cancel reminder
+            if cancelled:
                 appointment_scheduler.cancel_reminder(appointment_id)
-                
-                # Send cancellation notification
-                try:
-                    whatsapp_service.send_appointment_cancellation(
-                        client_name=appointment.user.name,
-                        client_phone=appointment.user.phone,
-                        service_name=appointment.service.name,
-                        appointment_date=appointment.appointment_date,
-                        appointment_time=appointment.appointment_time,
-                        reason=data.get('reason', '')
-                    )
-                except Exception as e:
-                    print(f"Failed to send cancellation notification: {str(e)}")
             
             elif data['status'] == 'upcoming' and old_status == 'cancelled':
                 # Reschedule reminder if appointment is reactivated
@@ -185,6 +285,8 @@ def update_appointment_status(appointment_id):
         
         return jsonify({'error': 'Invalid status'}), 400
         
+    except IntegrityError as e:
+        return integrity_error_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -200,14 +302,8 @@ def reschedule_appointment(appointment_id):
         new_date = datetime.strptime(data['appointment_date'], '%Y-%m-%d').date()
         new_time = datetime.strptime(data['appointment_time'], '%H:%M').time()
         
-        # Check for conflicts
-        existing = Appointment.query.filter_by(
-            appointment_date=new_date,
-            appointment_time=new_time,
-            status='upcoming'
-        ).filter(Appointment.id != appointment_id).first()
-        
-        if existing:
+        # Check for conflicts against the service duration
+        if slot_index.find_conflict(new_date, new_time, appointment.service.duration, ignore_id=appointment_id):
             return jsonify({'error': 'Time slot already booked'}), 409
         
         # Update appointment
@@ -218,47 +314,44 @@ def reschedule_appointment(appointment_id):
         appointment.appointment_time = new_time
         db.session.commit()
         
+        if appointment.status == 'upcoming':
+            slot_index.add(appointment_id, new_date, new_time, appointment.service.duration)
+        
         # Reschedule reminder
         appointment_scheduler.reschedule_reminder(appointment_id)
         
-        # Send reschedule notification
+        # Queue reschedule notification
         try:
-            message = f"""📅 *Appointment Rescheduled* 📅
-
-Hello {appointment.user.name}!
-
-Your appointment has been rescheduled:
-
-*Previous:*
-📅 {old_date.strftime('%A, %B %d, %Y')}
-⏰ {old_time.strftime('%I:%M %p')}
-
-*New Schedule:*
-📅 {new_date.strftime('%A, %B %d, %Y')}
-⏰ {new_time.strftime('%I:%M %p')}
-💄 Service: {appointment.service.name}
-
-We apologize for any inconvenience. Looking forward to seeing you!
-
-*Beauty Palace Team* 💕"""
-
-            whatsapp_service.send_message(appointment.user.phone, message)
+            whatsapp_service.send_appointment_rescheduled(
+                client_name=appointment.user.name,
+                client_phone=appointment.user.phone,
+                service_name=appointment.service.name,
+                old_date=old_date,
+                old_time=old_time,
+                new_date=new_date,
+                new_time=new_time,
+                idempotency_key=f'appointment:{appointment_id}:reschedule:{new_date.isoformat()}T{new_time.strftime("%H:%M")}'
+            )
+            db.session.commit()
             
         except Exception as e:
-            print(f"Failed to send reschedule notification: {str(e)}")
+            db.session.rollback()
+            print(f"Failed to queue reschedule notification: {str(e)}")
         
         return jsonify({
             'message': 'Appointment rescheduled successfully',
             'appointment': appointment.to_dict()
         })
         
+    except IntegrityError as e:
+        return integrity_error_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @appointments_bp.route('/send-reminder/<int:appointment_id>', methods=['POST'])
 def send_manual_reminder(appointment_id):
-    """Send manual reminder for appointment"""
+    """Queue a manual reminder for appointment"""
     try:
         appointment = Appointment.query.get_or_404(appointment_id)
         
@@ -270,13 +363,17 @@ def send_manual_reminder(appointment_id):
             client_phone=appointment.user.phone,
             service_name=appointment.service.name,
             appointment_date=appointment.appointment_date,
-            appointment_time=appointment.appointment_time
+            appointment_time=appointment.appointment_time,
+            # One manual reminder per minute absorbs double clicks in the admin panel
+            idempotency_key=f'appointment:{appointment_id}:manual_reminder:{datetime.utcnow().strftime("%Y%m%d%H%M")}'
         )
+        db.session.commit()
         
         if success:
-            return jsonify({'message': 'Reminder sent successfully'})
+            return jsonify({'message': 'Reminder queued successfully'})
         else:
-            return jsonify({'error': 'Failed to send reminder'}), 500
+            return jsonify({'error': 'Failed to queue reminder'}), 500
             
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
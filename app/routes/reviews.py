@@ -5,15 +5,31 @@ from app.models.review import Review, ReviewImage
 from app.models.user import User
 from app.utils.file_upload import allowed_file, save_uploaded_file
 from app.utils.whatsapp import whatsapp_service
+from app.utils.pagination import wants_stream, wants_page, keyset_page, order_by_keyset, stream_ndjson
+from app.utils.review_feed import review_feed
 import os
 
 reviews_bp = Blueprint('reviews', __name__)
 
 @reviews_bp.route('/', methods=['GET'])
 def get_reviews():
-    """Get all approved reviews"""
-    reviews = Review.query.filter_by(status='approved').order_by(Review.created_at.desc()).all()
-    return jsonify([review.to_dict() for review in reviews])
+    """Get all approved reviews, newest first (from the precomputed feed).
+    
+    Pass ?limit=/&cursor= for keyset pages.
+    """
+    try:
+        if wants_page():
+            return current_app.response_class(review_feed.page_json(), mimetype='application/json')
+        
+        return current_app.response_class(review_feed.all_json(), mimetype='application/json')
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@reviews_bp.route('/summary', methods=['GET'])
+def get_review_summary():
+    """Rating count, average and histogram per service"""
+    return current_app.response_class(review_feed.summary_json(), mimetype='application/json')
 
 @reviews_bp.route('/', methods=['POST'])
 def create_review():
@@ -60,18 +76,16 @@ def create_review():
                         )
                         db.session.add(review_image)
         
-        db.session.commit()
+        # Queue thank you WhatsApp message with the review
+        if user.phone:
+            whatsapp_service.send_review_thank_you(
+                client_name=user.name,
+                client_phone=user.phone,
+                rating=review.rating,
+                idempotency_key=f'review:{review.id}:thank_you'
+            )
         
-        # Send thank you WhatsApp message
-        try:
-            if user.phone:
-                whatsapp_service.send_review_thank_you(
-                    client_name=user.name,
-                    client_phone=user.phone,
-                    rating=review.rating
-                )
-        except Exception as e:
-            print(f"Failed to send review thank you: {str(e)}")
+        db.session.commit()
         
         return jsonify({
             'message': 'Review submitted successfully! Thank you for your feedback.',
@@ -84,9 +98,31 @@ def create_review():
 
 @reviews_bp.route('/admin', methods=['GET'])
 def get_all_reviews():
-    """Get all reviews for admin (including pending)"""
-    reviews = Review.query.order_by(Review.created_at.desc()).all()
-    return jsonify([review.to_dict() for review in reviews])
+    """Get all reviews for admin (including pending).
+    
+    Pass ?limit=/&cursor= for keyset pages or ?format=ndjson to stream.
+    """
+    try:
+        query = Review.query_with_details()
+        keyset = [Review.created_at, Review.id]
+        
+        if wants_stream():
+            return stream_ndjson(order_by_keyset(query, keyset, descending=True), Review.to_dict)
+        
+        if wants_page():
+            reviews, next_cursor = keyset_page(query, keyset, descending=True)
+            return jsonify({
+                'reviews': [review.to_dict() for review in reviews],
+                'next_cursor': next_cursor
+            })
+        
+        reviews = order_by_keyset(query, keyset, descending=True).all()
+        return jsonify([review.to_dict() for review in reviews])
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @reviews_bp.route('/<int:review_id>/status', methods=['PUT'])
 def update_review_status(review_id):
@@ -97,30 +133,17 @@ def update_review_status(review_id):
         
         if data.get('status') in ['approved', 'rejected']:
             review.status = data['status']
-            db.session.commit()
             
-            # Send notification if approved
+            # Queue notification if approved
             if data['status'] == 'approved' and review.user.phone:
-                try:
-                    message = f"""🌟 *Review Approved!* 🌟
-
-Hello {review.user.name}!
-
-Great news! Your review has been approved and is now live on our website! ✨
-
-Thank you for sharing your experience with Beauty Palace. Your feedback helps other clients discover our services.
-
-*Special Offer:* Enjoy 15% off your next appointment as a thank you! 🎁
-
-Book your next visit:
-📞 Call or WhatsApp us
-💻 Visit our website
-
-*Beauty Palace Team* 💕"""
-
-                    whatsapp_service.send_message(review.user.phone, message)
-                except Exception as e:
-                    print(f"Failed to send review approval notification: {str(e)}")
+                whatsapp_service.send_review_approved(
+                    client_name=review.user.name,
+                    client_phone=review.user.phone,
+                    idempotency_key=f'review:{review_id}:approved'
+                )
+            
+            db.session.commit()
+            review_feed.update(review)
             
             return jsonify({'message': f'Review {data["status"]} successfully'})
         
@@ -0,0 +1,45 @@
+from flask import Blueprint, current_app, jsonify, send_file
+from werkzeug.security import safe_join
+from app.utils.file_upload import IMMUTABLE_CACHE_CONTROL
+import mimetypes
+import os
+
+uploads_bp = Blueprint('uploads', __name__)
+
+ONE_YEAR = 31536000
+
+@uploads_bp.route('/<folder>/<path:filename>', methods=['GET', 'HEAD'])
+def get_upload(folder, filename):
+    """Serve a stored upload.
+    
+    Names are content digests, so responses never change: the digest is the
+    ETag and the response is cacheable for a year. Delivery depends on
+    UPLOAD_DELIVERY:
+    
+    - 'sendfile' (default): Werkzeug file wrapper; servers such as gunicorn
+      hand it to sendfile(2). Range and conditional requests are answered here.
+    - 'x-sendfile': USE_X_SENDFILE, Apache/lighttpd read the file.
+    - 'x-accel': nginx serves the internal location UPLOAD_ACCEL_PREFIX,
+      including ranges and conditionals.
+    """
+    if folder not in current_app.config.get('UPLOAD_SERVED_FOLDERS', ('reviews',)):
+        return jsonify({'error': 'Not found'}), 404
+    
+    root = os.path.abspath(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
+    path = safe_join(root, folder, filename)
+    if path is None or not os.path.isfile(path):
+        return jsonify({'error': 'Not found'}), 404
+    
+    etag = os.path.splitext(os.path.basename(filename))[0]
+    
+    if current_app.config.get('UPLOAD_DELIVERY') == 'x-accel':
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        )
+        response.headers['X-Accel-Redirect'] = f"{current_app.config['UPLOAD_ACCEL_PREFIX'].rstrip('/')}/{folder}/{filename}"
+        response.set_etag(etag)
+    else:
+        response = send_file(path, conditional=True, etag=etag, max_age=ONE_YEAR)
+    
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
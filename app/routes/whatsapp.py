@@ -1,5 +1,9 @@
 from flask import Blueprint, request, jsonify
-from app.utils.whatsapp import whatsapp_service
+from sqlalchemy import func
+from app import db
+from app.models.outbox import WhatsAppOutbox
+from app.utils.auth_helpers import admin_required
+from app.utils.inbound import enqueue_payload, inbound_worker
 import hmac
 import hashlib
 import os
@@ -22,119 +26,56 @@ def verify_webhook():
 
 @whatsapp_bp.route('/webhook', methods=['POST'])
 def handle_webhook():
-    """Handle incoming WhatsApp messages"""
+    """Queue incoming WhatsApp messages and acknowledge immediately"""
     try:
-        data = request.get_json()
-        
         # Verify webhook signature
         signature = request.headers.get('X-Hub-Signature-256')
         if not verify_signature(request.data, signature):
             return 'Unauthorized', 401
         
-        # Process incoming messages
-        if 'messages' in data.get('entry', [{}])[0].get('changes', [{}])[0].get('value', {}):
-            messages = data['entry'][0]['changes'][0]['value']['messages']
-            
-            for message in messages:
-                phone_number = message['from']
-                message_text = message.get('text', {}).get('body', '').lower()
-                
-                # Auto-reply based on message content
-                if 'book' in message_text or 'appointment' in message_text:
-                    reply = """📅 *Book Your Appointment* 📅
-
-Thank you for your interest! Here's how to book:
-
-🌐 *Online:* Visit our website
-📞 *Call:* +91-XXXXXXXXXX
-📱 *WhatsApp:* Send us your preferred date and time
-
-*Available Services:*
-💄 Haircut & Styling
-✨ Facial Treatment
-🌟 Hair Smoothing
-💅 Keratin Treatment
-🧴 Waxing Services
-💋 Professional Makeup
-
-*Hours:*
-Mon-Fri: 9 AM - 7 PM
-Saturday: 9 AM - 6 PM
-Sunday: 10 AM - 4 PM
-
-*Beauty Palace Team* 💕"""
-                    
-                    whatsapp_service.send_message(phone_number, reply)
-                
-                elif 'price' in message_text or 'cost' in message_text:
-                    reply = """💰 *Our Service Prices* 💰
-
-💄 *Haircut & Styling:* ₹800-1500
-✨ *Facial Treatment:* ₹1200-2500
-🌟 *Hair Smoothing:* ₹3000-5000
-💅 *Keratin Treatment:* ₹4000-8000
-🧴 *Waxing Services:* ₹500-1500
-💋 *Professional Makeup:* ₹2000-4000
-
-*Prices vary based on hair length and specific requirements*
-
-📞 Call for exact pricing and consultation!
-
-*Beauty Palace Team* 💕"""
-                    
-                    whatsapp_service.send_message(phone_number, reply)
-                
-                elif 'location' in message_text or 'address' in message_text:
-                    reply = """📍 *Beauty Palace Location* 📍
-
-*Address:*
-Beauty Palace Saswad
-Pune, Maharashtra, India
-
-*Landmarks:*
-• Near Saswad Bus Stand
-• Opposite City Bank
-• Next to Medical Store
-
-*Parking:* Available
-*Accessibility:* Ground floor
-
-*Directions:*
-🚗 Google Maps: Search "Beauty Palace Saswad"
-🚌 Bus: Saswad Bus Stand (2 min walk)
-
-See you soon! ✨
-
-*Beauty Palace Team* 💕"""
-                    
-                    whatsapp_service.send_message(phone_number, reply)
-                
-                else:
-                    # Default reply
-                    reply = """🌟 *Welcome to Beauty Palace!* 🌟
-
-Thank you for contacting us! 💕
-
-*Quick Help:*
-📅 Type "book" for appointment booking
-💰 Type "price" for service pricing
-📍 Type "location" for our address
-
-*Or call us directly:*
-📞 +91-XXXXXXXXXX
-
-Our team will respond shortly!
-
-*Beauty Palace Team* ✨"""
-                    
-                    whatsapp_service.send_message(phone_number, reply)
+        # Persist and ack; routing and replies happen in the inbound workers
+        enqueue_payload(request.get_data(as_text=True))
+        db.session.commit()
+        inbound_worker.notify()
         
         return 'OK', 200
         
     except Exception as e:
+        db.session.rollback()
         print(f"Webhook error: {str(e)}")
         return 'Error', 500
 
+@whatsapp_bp.route('/outbox', methods=['GET'])
+@admin_required
+def get_outbox_summary(current_user_id):
+    """Count outbox messages by delivery status"""
+    try:
+        counts = dict(
+            db.session.query(WhatsAppOutbox.status, func.count(WhatsAppOutbox.id))
+            .group_by(WhatsAppOutbox.status)
+            .all()
+        )
+        failed = WhatsAppOutbox.query.filter_by(status='failed').order_by(
+            WhatsAppOutbox.created_at.desc()
+        ).limit(20).all()
+        
+        return jsonify({
+            'counts': {status: counts.get(status, 0) for status in ['pending', 'sending', 'sent', 'failed']},
+            'recent_failures': [message.to_dict() for message in failed]
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@whatsapp_bp.route('/outbox/<path:idempotency_key>', methods=['GET'])
+@admin_required
+def get_outbox_message(current_user_id, idempotency_key):
+    """Delivery status of a queued message, e.g. appointment:42:confirmation"""
+    message = WhatsAppOutbox.query.filter_by(idempotency_key=idempotency_key).first()
+    if not message:
+        return jsonify({'error': 'Message not found'}), 404
+    return jsonify(message.to_dict())
+
 def verify_signature(payload, signature):
     """Verify webhook signature"""
     try:
@@ -0,0 +1,196 @@
+from datetime import datetime
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models.appointment import Appointment
+from app.models.service import Service
+from app.utils.cache import TTLCache
+from app.utils.calendar_feed import STATUSES
+
+UPCOMING, COMPLETED, CANCELLED = (STATUSES.index(name) for name in ('upcoming', 'completed', 'cancelled'))
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# (from, to) -> report, recomputed once ANALYTICS_CACHE_TTL_SECONDS have passed
+analytics_cache = TTLCache(maxsize=64, ttl=900)
+
+
+class AppointmentArrays:
+    """One NumPy array per column of the appointments in a date range.
+
+    day is days since the range start, minute is minute of the day and
+    service indexes service_ids.
+    """
+
+    COLUMNS = (
+        ('day', np.int32),
+        ('minute', np.int32),
+        ('status', np.int8),
+        ('service', np.int32),
+        ('price', np.float64),
+        ('duration', np.int32),
+    )
+
+    def __init__(self, start, batches, service_ids):
+        self.start = start
+        self.service_ids = service_ids
+        for position, (name, dtype) in enumerate(self.COLUMNS):
+            chunks = [batch[position] for batch in batches]
+            setattr(self, name, np.concatenate(chunks) if chunks else np.empty(0, dtype))
+
+    def __len__(self):
+        return len(self.day)
+
+
+def load_appointment_arrays(start, end, batch_size=5000):
+    """Stream appointments joined with their service price and duration.
+
+    Rows come from a server-side cursor batch_size at a time and each batch
+    is packed into arrays right away, so memory holds arrays, not row tuples.
+    """
+    query = (
+        select(
+            Appointment.appointment_date,
+            Appointment.appointment_time,
+            Appointment.status,
+            Appointment.service_id,
+            Service.price,
+            Service.duration,
+        )
+        .join(Service, Appointment.service_id == Service.id)
+        .where(Appointment.appointment_date.between(start, end))
+        .execution_options(stream_results=True)
+    )
+
+    statuses = {name: position for position, name in enumerate(STATUSES)}
+    service_index = {}
+    batches = []
+
+    result = db.session.execute(query)
+    for rows in result.partitions(batch_size):
+        count = len(rows)
+        batches.append((
+            np.fromiter(((row[0] - start).days for row in rows), np.int32, count),
+            np.fromiter((row[1].hour * 60 + row[1].minute for row in rows), np.int32, count),
+            np.fromiter((statuses[row[2] or 'upcoming'] for row in rows), np.int8, count),
+            np.fromiter((service_index.setdefault(row[3], len(service_index)) for row in rows), np.int32, count),
+            np.fromiter((float(row[4]) for row in rows), np.float64, count),
+            np.fromiter((row[5] for row in rows), np.int32, count),
+        ))
+
+    return AppointmentArrays(start, batches, list(service_index))
+
+
+def ratio(numerator, denominator):
+    """Elementwise numerator / denominator, 0 where the denominator is 0"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def hour_of_week_occupancy(arrays, days, chairs):
+    """7x24 share of chair time booked, Monday first.
+
+    Booked minutes are accumulated with a start/end difference array over
+    the minutes of one week; appointments running past Sunday midnight wrap
+    into Monday.
+    """
+    booked = arrays.status != CANCELLED
+    weekday = (arrays.day[booked] + arrays.start.weekday()) % 7
+    starts = weekday.astype(np.int64) * MINUTES_PER_DAY + arrays.minute[booked]
+    ends = starts + arrays.duration[booked]
+
+    span = int(ends.max()) + 1 if len(ends) else MINUTES_PER_WEEK
+    span = max(span, MINUTES_PER_WEEK)
+    busy = np.cumsum(np.bincount(starts, minlength=span) - np.bincount(ends, minlength=span))
+    week = busy[:MINUTES_PER_WEEK].copy()
+    overflow = busy[MINUTES_PER_WEEK:]
+    week[:len(overflow)] += overflow
+
+    booked_minutes = week.reshape(7 * 24, 60).sum(axis=1)
+    weekdays_in_range = np.bincount((np.arange(days) + arrays.start.weekday()) % 7, minlength=7)
+    capacity = np.repeat(weekdays_in_range, 24) * 60 * chairs
+    return ratio(booked_minutes, capacity).reshape(7, 24)
+
+
+def service_trends(arrays, weeks):
+    """Per-service weekly bookings and revenue, plus the least-squares slope of bookings per week"""
+    services = len(arrays.service_ids)
+    week = arrays.day // 7
+    cells = arrays.service * weeks + week
+    booked = arrays.status != CANCELLED
+    completed = arrays.status == COMPLETED
+
+    bookings = np.bincount(cells[booked], minlength=services * weeks).reshape(services, weeks)
+    revenue = np.bincount(
+        cells[completed], weights=arrays.price[completed], minlength=services * weeks
+    ).reshape(services, weeks)
+
+    x = np.arange(weeks) - (weeks - 1) / 2
+    slope = bookings @ x / (x @ x) if weeks > 1 else np.zeros(services)
+    return bookings, revenue, slope
+
+
+def summarize(arrays, end, chairs):
+    days = (end - arrays.start).days + 1
+    weeks = (days + 6) // 7
+    services = len(arrays.service_ids)
+
+    completed = arrays.status == COMPLETED
+    upcoming = arrays.status == UPCOMING
+    cancelled = arrays.status == CANCELLED
+
+    revenue_by_day = np.bincount(arrays.day[completed], weights=arrays.price[completed], minlength=days)
+    appointments_by_service = np.bincount(arrays.service, minlength=services)
+    cancelled_by_service = np.bincount(arrays.service[cancelled], minlength=services)
+    service_cancellation = ratio(cancelled_by_service, appointments_by_service)
+    bookings, revenue, slope = service_trends(arrays, weeks)
+
+    names = {}
+    if services:
+        names = dict(db.session.execute(
+            select(Service.id, Service.name).where(Service.id.in_(arrays.service_ids))
+        ).all())
+
+    return {
+        'from': arrays.start.isoformat(),
+        'to': end.isoformat(),
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'appointments': len(arrays),
+        'revenue': {
+            'completed': round(float(revenue_by_day.sum()), 2),
+            'upcoming': round(float(arrays.price[upcoming].sum()), 2),
+            'by_day': np.round(revenue_by_day, 2).tolist(),
+        },
+        'cancellation_rate': round(float(ratio(cancelled.sum(), len(arrays))), 4),
+        'occupancy': {
+            'chairs': chairs,
+            'hour_of_week': np.round(hour_of_week_occupancy(arrays, days, chairs), 4).tolist(),
+        },
+        'services': [
+            {
+                'id': service_id,
+                'name': names.get(service_id),
+                'appointments': int(appointments_by_service[i]),
+                'revenue': round(float(revenue[i].sum()), 2),
+                'cancellation_rate': round(float(service_cancellation[i]), 4),
+                'weekly_bookings': bookings[i].tolist(),
+                'weekly_revenue': np.round(revenue[i], 2).tolist(),
+                'trend': round(float(slope[i]), 4),
+            }
+            for i, service_id in enumerate(arrays.service_ids)
+        ],
+    }
+
+
+def business_analytics(start, end):
+    """Report for start..end (inclusive), at most ANALYTICS_CACHE_TTL_SECONDS old"""
+    key = (start, end)
+    report = analytics_cache.get(key)
+    if report is None:
+        config = current_app.config
+        arrays = load_appointment_arrays(start, end, config.get('ANALYTICS_BATCH_SIZE', 5000))
+        report = summarize(arrays, end, config.get('ANALYTICS_CHAIRS', 1))
+        analytics_cache.set(key, report, ttl=config.get('ANALYTICS_CACHE_TTL_SECONDS', 900))
+    return report
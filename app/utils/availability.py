@@ -0,0 +1,191 @@
+import bisect
+import pytz
+import threading
+import time as clock
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models.appointment import Appointment
+from app.models.service import Service
+
+# SQLSTATE of the appointments_no_overlap exclusion constraint (database/init.sql)
+EXCLUSION_VIOLATION = '23P01'
+
+def to_minutes(value):
+    """Convert a time (or 'HH:MM' string) to minutes since midnight"""
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%H:%M').time()
+    return value.hour * 60 + value.minute
+
+
+def format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def is_overlap_violation(error):
+    """True when an IntegrityError was raised by the no-overlap constraint"""
+    return getattr(getattr(error, 'orig', None), 'pgcode', None) == EXCLUSION_VIOLATION
+
+
+class DaySchedule:
+    """Booked intervals for one day, kept sorted by start minute"""
+
+    __slots__ = ('starts', 'ends', 'ids', 'max_length', 'loaded_at')
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.ids = []
+        self.max_length = 0
+        self.loaded_at = clock.monotonic()
+
+    def add(self, appointment_id, start, end):
+        pos = bisect.bisect_right(self.starts, start)
+        self.starts.insert(pos, start)
+        self.ends.insert(pos, end)
+        self.ids.insert(pos, appointment_id)
+        self.max_length = max(self.max_length, end - start)
+
+    def remove(self, appointment_id, start):
+        pos = bisect.bisect_left(self.starts, start)
+        while pos < len(self.starts) and self.starts[pos] == start:
+            if self.ids[pos] == appointment_id:
+                del self.starts[pos]
+                del self.ends[pos]
+                del self.ids[pos]
+                return True
+            pos += 1
+        return False
+
+    def find_conflict(self, start, end, ignore_id=None):
+        """Return the id of an interval overlapping [start, end), or None.
+
+        Only intervals starting in (start - max_length, end) can overlap, so
+        the scan is two bisects plus the handful of bookings in that window.
+        """
+        lo = bisect.bisect_right(self.starts, start - self.max_length)
+        hi = bisect.bisect_left(self.starts, end)
+        for pos in range(lo, hi):
+            if self.ends[pos] > start and self.ids[pos] != ignore_id:
+                return self.ids[pos]
+        return None
+
+
+class SlotIndex:
+    """Per-day interval index of upcoming appointments and their durations"""
+
+    def __init__(self):
+        self._days = {}
+        self._entries = {}  # appointment_id -> (date, start)
+        self._lock = threading.RLock()
+
+    def _ttl(self):
+        return current_app.config.get('SLOT_INDEX_TTL_SECONDS', 30)
+
+    def _load_day(self, day):
+        """Build the schedule for a day with a single joined query"""
+        rows = db.session.query(
+            Appointment.id,
+            Appointment.appointment_time,
+            Service.duration
+        ).join(Service, Appointment.service_id == Service.id).filter(
+            Appointment.appointment_date == day,
+            Appointment.status == 'upcoming'
+        ).all()
+
+        schedule = DaySchedule()
+        for appointment_id, appointment_time, duration in rows:
+            start = to_minutes(appointment_time)
+            schedule.add(appointment_id, start, start + duration)
+        return schedule
+
+    def _get_day(self, day):
+        schedule = self._days.get(day)
+        if schedule is None or clock.monotonic() - schedule.loaded_at > self._ttl():
+            if schedule is not None:
+                for appointment_id in schedule.ids:
+                    self._entries.pop(appointment_id, None)
+            schedule = self._load_day(day)
+            self._days[day] = schedule
+            for appointment_id, start in zip(schedule.ids, schedule.starts):
+                self._entries[appointment_id] = (day, start)
+        return schedule
+
+    def find_conflict(self, day, start_time, duration, ignore_id=None):
+        """Return the id of an upcoming appointment overlapping the slot, or None"""
+        start = to_minutes(start_time)
+        with self._lock:
+            return self._get_day(day).find_conflict(start, start + duration, ignore_id)
+
+    def add(self, appointment_id, day, start_time, duration):
+        start = to_minutes(start_time)
+        with self._lock:
+            schedule = self._get_day(day)
+            self.remove(appointment_id)
+            schedule.add(appointment_id, start, start + duration)
+            self._entries[appointment_id] = (day, start)
+
+    def remove(self, appointment_id):
+        with self._lock:
+            entry = self._entries.pop(appointment_id, None)
+            if entry is None:
+                return False
+            day, start = entry
+            schedule = self._days.get(day)
+            return schedule.remove(appointment_id, start) if schedule else False
+
+    def invalidate(self, day=None):
+        """Drop cached days so they are reloaded from the database"""
+        with self._lock:
+            days = [day] if day else list(self._days)
+            for d in days:
+                schedule = self._days.pop(d, None)
+                if schedule:
+                    for appointment_id in schedule.ids:
+                        self._entries.pop(appointment_id, None)
+
+    def business_hours(self, day):
+        opening = current_app.config['BUSINESS_HOURS'].get(day.weekday())
+        if not opening:
+            return None
+        return to_minutes(opening[0]), to_minutes(opening[1])
+
+    def now(self):
+        """Current wall-clock time in the salon's timezone (naive, like appointment columns)"""
+        timezone = pytz.timezone(current_app.config.get('SCHEDULER_TIMEZONE', 'Asia/Kolkata'))
+        return datetime.now(timezone).replace(tzinfo=None)
+
+    def free_slots(self, day, duration, now=None):
+        """List start times ('HH:MM') on the slot grid where a service of the given duration fits.
+
+        Past days have no slots, and today's start after `now` (salon time by default).
+        """
+        now = now or self.now()
+        if day < now.date():
+            return []
+
+        hours = self.business_hours(day)
+        if not hours:
+            return []
+
+        opening, closing = hours
+        step = current_app.config.get('SLOT_INTERVAL_MINUTES', 30)
+
+        first = opening
+        if day == now.date():
+            now_minutes = now.hour * 60 + now.minute + (1 if now.second or now.microsecond else 0)
+            if now_minutes > opening:
+                # Round up to the next slot on the grid
+                first = opening + -(-(now_minutes - opening) // step) * step
+
+        with self._lock:
+            schedule = self._get_day(day)
+            return [
+                format_minutes(start)
+                for start in range(first, closing - duration + 1, step)
+                if schedule.find_conflict(start, start + duration) is None
+            ]
+
+
+# Initialize slot index
+slot_index = SlotIndex()
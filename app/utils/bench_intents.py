@@ -0,0 +1,65 @@
+"""Messages/sec of the Aho-Corasick intent router vs substring scanning.
+
+Only matching is timed; reply handlers (which read services/offers) are not
+called. The old 8-keyword chain is included for reference: it is faster per
+message but knows no Hindi/Marathi keywords and has no word boundaries.
+
+    python -m app.utils.bench_intents [messages]
+"""
+import random
+import sys
+import time
+from app.utils.intents import intent_router
+
+SAMPLES = [
+    "Hi, I want to book a haircut for tomorrow",
+    "What is the price of keratin treatment?",
+    "kiti dar ahe facial cha?",
+    "हेयरकट की कीमत कितनी है",
+    "Where is your salon located?",
+    "any offers this weekend?",
+    "तुमचा पत्ता काय आहे",
+    "Thank you so much, the makeup for my sister's wedding was lovely!",
+    "Can I get an appointment on Sunday at 11?",
+    "ok",
+]
+
+
+def substring_chain(message_text):
+    message_text = message_text.lower()
+    if 'book' in message_text or 'appointment' in message_text:
+        return 'book'
+    if 'price' in message_text or 'cost' in message_text:
+        return 'price'
+    if 'location' in message_text or 'address' in message_text:
+        return 'location'
+    return None
+
+
+def keyword_scan(message_text):
+    """Same keyword sets as the router, checked one `in` at a time"""
+    message_text = message_text.lower()
+    for name, keywords, _ in intent_router.intents:
+        if any(keyword.rstrip('*') in message_text for keyword in keywords):
+            return name
+    return None
+
+
+def run(label, match, messages):
+    start = time.perf_counter()
+    for message in messages:
+        match(message)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {len(messages) / elapsed:12,.0f} messages/sec")
+
+
+def bench(count=200000):
+    messages = [random.choice(SAMPLES) for _ in range(count)]
+    run('substring chain (8 keywords)', substring_chain, messages)
+    keywords = sum(len(keywords) for _, keywords, _ in intent_router.intents)
+    run(f'substring scan ({keywords} keywords)', keyword_scan, messages)
+    run(f'aho-corasick ({keywords} keywords)', intent_router.match, messages)
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,75 @@
+"""Load test for GET /api/uploads: full downloads, range requests and revalidation.
+
+Serves a generated image from a temporary UPLOAD_FOLDER through the uploads
+blueprint on a threaded local server, then hammers it from several client
+threads with keep-alive sessions. Numbers are for the 'sendfile' delivery
+mode; behind nginx with UPLOAD_DELIVERY=x-accel Python only sets headers.
+
+    python -m app.utils.bench_uploads [requests] [threads] [size_kb]
+"""
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask
+from werkzeug.serving import make_server
+import hashlib
+import os
+import requests
+import sys
+import tempfile
+import threading
+import time
+from app.routes.uploads import uploads_bp
+
+
+def start_server(upload_folder):
+    app = Flask(__name__)
+    app.config['UPLOAD_FOLDER'] = upload_folder
+    app.register_blueprint(uploads_bp, url_prefix='/api/uploads')
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(label, url, headers, requests_total, threads, expected_status):
+    local = threading.local()
+
+    def fetch(_):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        response = local.session.get(url, headers=headers)
+        assert response.status_code == expected_status, response.status_code
+        return len(response.content)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        transferred = sum(pool.map(fetch, range(requests_total)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{label:<22} {requests_total / elapsed:9.0f} req/s  "
+          f"{transferred / elapsed / 1e6:8.1f} MB/s  (HTTP {expected_status})")
+
+
+def bench(requests_total=2000, threads=8, size_kb=512):
+    with tempfile.TemporaryDirectory() as upload_folder:
+        os.makedirs(os.path.join(upload_folder, 'reviews'))
+        body = b'\xff\xd8\xff\xe0' + os.urandom(size_kb * 1024 - 4)
+        digest = hashlib.sha256(body).hexdigest()
+        with open(os.path.join(upload_folder, 'reviews', f'{digest}.jpg'), 'wb') as f:
+            f.write(body)
+
+        server = start_server(upload_folder)
+        url = f"http://127.0.0.1:{server.server_port}/api/uploads/reviews/{digest}.jpg"
+
+        first = requests.get(url)
+        print(f"{size_kb} KB image, Cache-Control: {first.headers['Cache-Control']}, ETag: {first.headers['ETag'][:20]}...")
+
+        run('full GET', url, {}, requests_total, threads, 200)
+        run('Range: first 64 KB', url, {'Range': 'bytes=0-65535'}, requests_total, threads, 206)
+        run('If-None-Match', url, {'If-None-Match': first.headers['ETag']}, requests_total, threads, 304)
+
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    bench(*args)
@@ -0,0 +1,84 @@
+"""Compare per-message connection cost of plain requests.post vs the pooled session.
+
+Runs against a local stub of the Graph API messages endpoint, so only
+connection setup and HTTP overhead are measured (no TLS; real handshakes
+to graph.facebook.com cost several round trips more per new connection).
+
+    python -m app.utils.bench_whatsapp_session [messages]
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from flask import Flask
+import requests
+import sys
+import threading
+import time
+from app.utils.whatsapp import WhatsAppService
+
+
+class StubGraphHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = b'{"messages": [{"id": "wamid.stub"}]}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubGraphHandler)
+    server.lock = threading.Lock()
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(label, server, send, messages):
+    server.connections = 0
+    start = time.perf_counter()
+    for _ in range(messages):
+        send()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed / messages * 1000:8.3f} ms/message  "
+          f"{server.connections:5d} connections opened")
+
+
+def bench(messages=500):
+    server = start_stub()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}/v18.0"
+    payload = {"messaging_product": "whatsapp", "to": "919876543210", "type": "text", "text": {"body": "Hi"}}
+
+    def unpooled():
+        requests.post(
+            f"{api_url}/stub/messages",
+            headers={'Authorization': 'Bearer stub', 'Content-Type': 'application/json'},
+            json=payload,
+            timeout=30
+        )
+
+    app = Flask(__name__)
+    service = WhatsAppService()
+    service.api_url = api_url
+    service.phone_number_id = 'stub'
+
+    with app.app_context():
+        run('requests.post per call', server, unpooled, messages)
+        run('pooled session', server, lambda: service.send_message('9876543210', 'Hi'), messages)
+        service.close()
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,84 @@
+from datetime import datetime
+from sqlalchemy import select
+from app import db
+from app.models.appointment import Appointment
+from app.models.service import Service
+from app.models.user import User
+
+STATUSES = ('upcoming', 'completed', 'cancelled')
+
+
+class LookupTable:
+    """Dictionary encoder: each distinct id gets the next index, in first-seen order"""
+
+    def __init__(self, *columns):
+        self.columns = columns
+        self.index = {}
+        self.values = {column: [] for column in ('id',) + columns}
+
+    def encode(self, id, *values):
+        position = self.index.get(id)
+        if position is None:
+            position = self.index[id] = len(self.index)
+            self.values['id'].append(id)
+            for column, value in zip(self.columns, values):
+                self.values[column].append(value)
+        return position
+
+
+def calendar_payload(start, end, status=None):
+    """Appointments between two dates (inclusive) as a columnar payload.
+
+    Services and users are sent once as lookup tables; appointments are
+    parallel arrays holding indexes into them and `start`, the minutes from
+    midnight of `from`. One query, no ORM objects.
+    """
+    query = (
+        select(
+            Appointment.id,
+            Appointment.appointment_date,
+            Appointment.appointment_time,
+            Appointment.status,
+            Appointment.user_id,
+            User.name,
+            User.phone,
+            Appointment.service_id,
+            Service.name,
+            Service.duration,
+        )
+        .join(User, Appointment.user_id == User.id)
+        .join(Service, Appointment.service_id == Service.id)
+        .where(Appointment.appointment_date.between(start, end))
+        .order_by(Appointment.appointment_date, Appointment.appointment_time, Appointment.id)
+    )
+    if status:
+        query = query.where(Appointment.status == status)
+
+    origin = datetime.combine(start, datetime.min.time())
+    statuses = {name: position for position, name in enumerate(STATUSES)}
+    users = LookupTable('name', 'phone')
+    services = LookupTable('name', 'duration')
+    ids, starts, user_refs, service_refs, status_refs = [], [], [], [], []
+
+    for (appointment_id, day, at, appointment_status, user_id, user_name, user_phone,
+         service_id, service_name, duration) in db.session.execute(query):
+        ids.append(appointment_id)
+        starts.append(int((datetime.combine(day, at) - origin).total_seconds()) // 60)
+        user_refs.append(users.encode(user_id, user_name, user_phone))
+        service_refs.append(services.encode(service_id, service_name, duration))
+        status_refs.append(statuses[appointment_status or 'upcoming'])
+
+    return {
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'statuses': list(STATUSES),
+        'services': services.values,
+        'users': users.values,
+        'appointments': {
+            'id': ids,
+            'start': starts,
+            'user': user_refs,
+            'service': service_refs,
+            'status': status_refs,
+        }
+    }
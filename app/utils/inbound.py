@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_
+from app import db
+from app.models.inbound import WhatsAppInbound
+from app.utils.intents import intent_router
+from app.utils.whatsapp import whatsapp_service
+from app.utils.workers import WorkerPool
+import json
+import random
+
+
+def iter_messages(payload):
+    """Yield every message in a webhook payload (all entries and changes)"""
+    for entry in payload.get('entry', []):
+        for change in entry.get('changes', []):
+            for message in change.get('value', {}).get('messages', []):
+                yield message
+
+
+def enqueue_payload(raw_body):
+    """Store a verified webhook body for the consumer pool; the caller commits"""
+    inbound = WhatsAppInbound(payload=raw_body)
+    db.session.add(inbound)
+    return inbound
+
+
+class InboundWorker(WorkerPool):
+    """Consumer pool that routes queued webhook messages and queues replies"""
+
+    name = 'whatsapp-inbound'
+    workers_setting = 'INBOUND_WORKERS'
+    poll_interval_setting = 'INBOUND_POLL_INTERVAL_SECONDS'
+
+    model = WhatsAppInbound
+    finished_statuses = ('processed', 'failed')
+    age_column = 'received_at'
+    retention_setting = 'INBOUND_RETENTION_DAYS'
+
+    def claim_batch(self, limit):
+        """Lock due payloads (skipping rows claimed by other workers) and mark them processing"""
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=current_app.config.get('INBOUND_VISIBILITY_TIMEOUT_SECONDS', 120))
+
+        payloads = WhatsAppInbound.query.filter(or_(
+            and_(WhatsAppInbound.status == 'pending', WhatsAppInbound.next_attempt_at <= now),
+            and_(WhatsAppInbound.status == 'processing', WhatsAppInbound.locked_at < stale)
+        )).order_by(
+            WhatsAppInbound.id.asc()
+        ).limit(limit).with_for_update(skip_locked=True).all()
+
+        for inbound in payloads:
+            inbound.status = 'processing'
+            inbound.locked_at = now
+            inbound.attempts += 1
+
+        db.session.commit()
+        return payloads
+
+    def handle(self, inbound):
+        """Route each message and queue its reply.
+
+        Meta redelivers webhooks it considers slow or failed, so the reply is
+        keyed on the WhatsApp message id: a redelivered message maps to the
+        same outbox row and is answered once.
+        """
+        for message in iter_messages(json.loads(inbound.payload)):
+            message_id = message.get('id')
+            phone_number = message.get('from')
+            if not message_id or not phone_number:
+                continue
+
+            message_text = message.get('text', {}).get('body', '')
+            whatsapp_service.queue_message(
+                phone_number,
+                intent_router.reply(message_text),
+                idempotency_key=f'inbound:{message_id}:reply'
+            )
+
+    def process(self, inbound):
+        try:
+            self.handle(inbound)
+            inbound.status = 'processed'
+            inbound.processed_at = datetime.utcnow()
+            inbound.last_error = None
+        except Exception as e:
+            db.session.rollback()
+            error = str(e)
+            if inbound.attempts >= current_app.config.get('INBOUND_MAX_ATTEMPTS', 5):
+                inbound.status = 'failed'
+            else:
+                base = current_app.config.get('INBOUND_RETRY_BASE_SECONDS', 10)
+                inbound.status = 'pending'
+                inbound.next_attempt_at = datetime.utcnow() + timedelta(
+                    seconds=base * 2 ** (inbound.attempts - 1) + random.uniform(0, base)
+                )
+            inbound.last_error = error
+
+        inbound.locked_at = None
+        db.session.commit()
+
+    def process_batch(self):
+        payloads = self.claim_batch(current_app.config.get('INBOUND_BATCH_SIZE', 50))
+        for inbound in payloads:
+            self.process(inbound)
+        return len(payloads)
+
+
+# Initialize inbound consumer pool (threads start in create_app)
+inbound_worker = InboundWorker()
@@ -0,0 +1,248 @@
+from collections import deque
+from datetime import date
+from app.models.service import Service
+from app.models.offer import Offer
+
+
+class AhoCorasick:
+    """Multi-keyword matcher: finds every keyword occurrence in one pass over the text"""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+    def add(self, keyword, value):
+        state = 0
+        for char in keyword:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append((len(keyword), value))
+
+    def build(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+        return self
+
+    def search(self, text):
+        """Yield (start, end, value) for every keyword occurrence"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, value in output[state]:
+                yield i - length + 1, i + 1, value
+
+
+class IntentRouter:
+    """Maps inbound messages to intents by keyword and builds the reply.
+
+    Keywords of all intents are compiled into one automaton, so a message is
+    scanned once however many keywords there are. Keywords match whole words;
+    a trailing '*' makes one a prefix ('book*' also matches 'booking'). When
+    several intents match, the one registered first wins.
+    """
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self.intents = []
+        self.automaton = None
+
+    def register(self, name, keywords, handler):
+        self.intents.append((name, [keyword.lower() for keyword in keywords], handler))
+        self.automaton = None
+        return self
+
+    def compile(self):
+        automaton = AhoCorasick()
+        for priority, (_, keywords, _) in enumerate(self.intents):
+            for keyword in keywords:
+                is_prefix = keyword.endswith('*')
+                automaton.add(keyword.rstrip('*'), (priority, is_prefix))
+        self.automaton = automaton.build()
+        return self
+
+    def match(self, message_text):
+        """Return the name of the best matching intent, or None"""
+        if self.automaton is None:
+            self.compile()
+
+        text = message_text.lower()
+        best = None
+        for start, end, (priority, is_prefix) in self.automaton.search(text):
+            if best is not None and priority >= best:
+                continue
+            if start and text[start - 1].isalnum():
+                continue
+            if not is_prefix and end < len(text) and text[end].isalnum():
+                continue
+            best = priority
+            if best == 0:
+                break
+        return None if best is None else self.intents[best][0]
+
+    def reply(self, message_text):
+        name = self.match(message_text)
+        for intent, _, handler in self.intents:
+            if intent == name:
+                return handler()
+        return self.fallback()
+
+
+def active_services():
+    return Service.query.filter_by(is_active=True).order_by(Service.created_at.asc()).all()
+
+
+def booking_reply():
+    services = '\n'.join(f"💄 {service.name} ({service.duration} min)" for service in active_services())
+    return f"""📅 *Book Your Appointment* 📅
+
+Thank you for your interest! Here's how to book:
+
+🌐 *Online:* Visit our website
+📞 *Call:* +91-XXXXXXXXXX
+📱 *WhatsApp:* Send us your preferred date and time
+
+*Available Services:*
+{services}
+
+*Hours:*
+Mon-Fri: 9 AM - 7 PM
+Saturday: 9 AM - 6 PM
+Sunday: 10 AM - 4 PM
+
+*Beauty Palace Team* 💕"""
+
+
+def prices_reply():
+    prices = '\n'.join(f"💄 *{service.name}:* ₹{service.price:,.0f}" for service in active_services())
+    return f"""💰 *Our Service Prices* 💰
+
+{prices}
+
+*Prices vary based on hair length and specific requirements*
+
+📞 Call for exact pricing and consultation!
+
+*Beauty Palace Team* 💕"""
+
+
+def offers_reply():
+    offers = Offer.query.filter(
+        Offer.is_active == True,
+        Offer.valid_until >= date.today()
+    ).order_by(Offer.created_at.desc()).all()
+
+    if not offers:
+        return """🎁 *Offers* 🎁
+
+There are no running offers right now, but new ones come up often!
+
+Type "price" to see our current prices.
+
+*Beauty Palace Team* 💕"""
+
+    lines = '\n\n'.join(
+        f"🎁 *{offer.title}* - {offer.discount_percentage:g}% off\n{offer.description}\n_Valid until {offer.valid_until.strftime('%d %b %Y')}_"
+        for offer in offers
+    )
+    return f"""✨ *Current Offers* ✨
+
+{lines}
+
+📅 Type "book" to reserve your slot!
+
+*Beauty Palace Team* 💕"""
+
+
+def location_reply():
+    return """📍 *Beauty Palace Location* 📍
+
+*Address:*
+Beauty Palace Saswad
+Pune, Maharashtra, India
+
+*Landmarks:*
+• Near Saswad Bus Stand
+• Opposite City Bank
+• Next to Medical Store
+
+*Parking:* Available
+*Accessibility:* Ground floor
+
+*Directions:*
+🚗 Google Maps: Search "Beauty Palace Saswad"
+🚌 Bus: Saswad Bus Stand (2 min walk)
+
+See you soon! ✨
+
+*Beauty Palace Team* 💕"""
+
+
+def welcome_reply():
+    return """🌟 *Welcome to Beauty Palace!* 🌟
+
+Thank you for contacting us! 💕
+
+*Quick Help:*
+📅 Type "book" for appointment booking
+💰 Type "price" for service pricing
+🎁 Type "offer" for current offers
+📍 Type "location" for our address
+
+*Or call us directly:*
+📞 +91-XXXXXXXXXX
+
+Our team will respond shortly!
+
+*Beauty Palace Team* ✨"""
+
+
+# English, Hindi and Marathi (Devanagari and common Latin transliterations)
+BOOKING_KEYWORDS = [
+    'book*', 'appoint*', 'apointment', 'reserv*', 'slot*', 'schedul*',
+    'buk', 'buking', 'bukking',
+    'बुक*', 'अपॉइंटमेंट', 'अपॉईंटमेंट', 'वेळ', 'समय',
+]
+PRICE_KEYWORDS = [
+    'price*', 'cost*', 'rate', 'rates', 'charge*', 'fee', 'fees', 'how much',
+    'kitna', 'kitne', 'kitni', 'keemat', 'kimat', 'daam', 'dam kya',
+    'kiti', 'kimmat', 'dar', 'kay dar',
+    'कीमत', 'कितना', 'कितने', 'दाम', 'किंमत', 'किती', 'दर',
+]
+OFFER_KEYWORDS = [
+    'offer*', 'discount*', 'deal', 'deals', 'sale', 'coupon*', 'promo*',
+    'chhoot', 'chhut', 'sut', 'savlat',
+    'ऑफर', 'छूट', 'सूट', 'सवलत',
+]
+LOCATION_KEYWORDS = [
+    'locat*', 'address', 'where', 'direction*', 'map', 'maps',
+    'kahan', 'kaha hai', 'kidhar', 'kuthe', 'patta',
+    'कहाँ', 'कहां', 'किधर', 'कुठे', 'पत्ता',
+]
+
+# Registration order is priority, as in the old if/elif chain:
+# "booking price?" is answered with the booking reply
+intent_router = IntentRouter(fallback=welcome_reply)
+intent_router.register('book', BOOKING_KEYWORDS, booking_reply)
+intent_router.register('price', PRICE_KEYWORDS, prices_reply)
+intent_router.register('offers', OFFER_KEYWORDS, offers_reply)
+intent_router.register('location', LOCATION_KEYWORDS, location_reply)
+intent_router.compile()
@@ -0,0 +1,238 @@
+from functools import lru_cache
+from string import Formatter
+
+
+@lru_cache(maxsize=1024)
+def format_date(value):
+    """'Wednesday, December 25, 2024' (cached; a salon only ever sees a few hundred dates)"""
+    return value.strftime('%A, %B %d, %Y')
+
+
+@lru_cache(maxsize=256)
+def format_time(value):
+    """'02:30 PM' (cached; bookings fall on a small grid of times)"""
+    return value.strftime('%I:%M %p')
+
+
+def format_lead(minutes):
+    """'1 hour', '24 hours', '30 minutes'"""
+    if minutes % 60:
+        return f"{minutes} minutes"
+    hours = minutes // 60
+    return f"{hours} hour" if hours == 1 else f"{hours} hours"
+
+
+class MessageTemplate:
+    """A notification body parsed once into literal text and named fields.
+
+    `name` is the approved WhatsApp Business template; `fields` gives the order
+    of its {{1}}, {{2}}, ... body parameters. `body` is the same message with
+    named placeholders, used when templates are disabled (development, or
+    before the template is approved).
+    """
+
+    __slots__ = ('name', 'fields', 'body', '_parts')
+
+    def __init__(self, name, fields, body):
+        self.name = name
+        self.fields = tuple(fields)
+        self.body = body
+        self._parts = [(literal, field) for literal, field, _, _ in Formatter().parse(body)]
+
+        unknown = {field for _, field in self._parts if field} - set(self.fields)
+        if unknown:
+            raise ValueError(f"Template {name} uses undeclared fields: {', '.join(sorted(unknown))}")
+
+    def render(self, values):
+        """Plain-text body for sending as a free-form message"""
+        out = []
+        for literal, field in self._parts:
+            out.append(literal)
+            if field:
+                out.append(str(values[field]))
+        return ''.join(out)
+
+    def params(self, values):
+        """Graph API body parameters in template order"""
+        return [{"type": "text", "text": str(values[field])} for field in self.fields]
+
+    def meta_body(self):
+        """Body text with {{n}} placeholders, as submitted for approval in WhatsApp Manager"""
+        positions = {field: i + 1 for i, field in enumerate(self.fields)}
+        return ''.join(
+            literal + (f'{{{{{positions[field]}}}}}' if field else '')
+            for literal, field in self._parts
+        )
+
+
+TEMPLATES = {
+    'booking_confirmation': (
+        'beauty_palace_booking_confirmation',
+        ['client_name', 'date', 'time', 'service_name', 'duration'],
+        """🌟 *Beauty Palace Booking Confirmed!* 🌟
+
+Hello {client_name}! ✨
+
+Your appointment has been successfully booked:
+
+📅 *Date:* {date}
+⏰ *Time:* {time}
+💄 *Service:* {service_name}
+⏱️ *Duration:* {duration} minutes
+
+📍 *Location:* Beauty Palace Saswad, Pune
+
+*Important Notes:*
+• Please arrive 10 minutes early
+• Bring a valid ID for verification
+• Cancellations must be made 24 hours in advance
+• You'll receive a reminder 1 hour before your appointment
+
+We're excited to pamper you! 💅✨
+
+For any queries, reply to this message or call us.
+
+*Beauty Palace Team* 💕"""
+    ),
+    'owner_notification': (
+        'beauty_palace_owner_notification',
+        ['client_name', 'client_phone', 'service_name', 'date', 'time', 'duration'],
+        """🔔 *NEW BOOKING ALERT!* 🔔
+
+*Client Details:*
+👤 Name: {client_name}
+📞 Phone: {client_phone}
+
+*Appointment Details:*
+💄 Service: {service_name}
+📅 Date: {date}
+⏰ Time: {time}
+⏱️ Duration: {duration} minutes
+
+*Action Required:*
+✅ Confirm appointment availability
+📋 Prepare service materials
+📞 Contact client if needed
+
+*Beauty Palace Admin Panel* 💼"""
+    ),
+    'appointment_reminder': (
+        'beauty_palace_appointment_reminder',
+        ['client_name', 'lead', 'service_name', 'date', 'time'],
+        """⏰ *Appointment Reminder* ⏰
+
+Hello {client_name}!
+
+This is a friendly reminder that your appointment at *Beauty Palace* is in {lead}:
+
+💄 *Service:* {service_name}
+📅 *Date:* {date}
+⏰ *Time:* {time}
+
+📍 *Address:* Beauty Palace Saswad, Pune
+
+*Please:*
+• Arrive 10 minutes early
+• Bring a valid ID
+• Wear comfortable clothing
+
+Looking forward to seeing you! ✨
+
+*Beauty Palace Team* 💕"""
+    ),
+    'review_thank_you': (
+        'beauty_palace_review_thank_you',
+        ['client_name', 'rating'],
+        """💕 *Thank You for Your Review!* 💕
+
+Dear {client_name},
+
+Thank you so much for taking the time to share your experience with us! ⭐ Your {rating}-star review means the world to our team.
+
+Your feedback helps us:
+✨ Improve our services
+💪 Motivate our team
+🌟 Help other clients choose us
+
+We're thrilled that you loved your experience at Beauty Palace!
+
+*Special Offer:* Get 10% off your next appointment as a thank you for your review! 🎁
+
+Book your next appointment:
+📞 Call us or WhatsApp
+💻 Visit our website
+
+*Beauty Palace Team* 💄✨"""
+    ),
+    'appointment_cancellation': (
+        'beauty_palace_appointment_cancellation',
+        ['client_name', 'service_name', 'date', 'time', 'reason'],
+        """❌ *Appointment Cancelled* ❌
+
+Hello {client_name},
+
+We regret to inform you that your appointment has been cancelled:
+
+💄 *Service:* {service_name}
+📅 *Date:* {date}
+⏰ *Time:* {time}
+
+*Reason:* {reason}
+
+*Next Steps:*
+📞 Call us to reschedule: +91-XXXXXXXXXX
+💻 Book online through our website
+📱 Reply to this message
+
+We apologize for any inconvenience and look forward to serving you soon!
+
+*Beauty Palace Team* 💕"""
+    ),
+    'appointment_rescheduled': (
+        'beauty_palace_appointment_rescheduled',
+        ['client_name', 'old_date', 'old_time', 'new_date', 'new_time', 'service_name'],
+        """📅 *Appointment Rescheduled* 📅
+
+Hello {client_name}!
+
+Your appointment has been rescheduled:
+
+*Previous:*
+📅 {old_date}
+⏰ {old_time}
+
+*New Schedule:*
+📅 {new_date}
+⏰ {new_time}
+💄 Service: {service_name}
+
+We apologize for any inconvenience. Looking forward to seeing you!
+
+*Beauty Palace Team* 💕"""
+    ),
+    'review_approved': (
+        'beauty_palace_review_approved',
+        ['client_name'],
+        """🌟 *Review Approved!* 🌟
+
+Hello {client_name}!
+
+Great news! Your review has been approved and is now live on our website! ✨
+
+Thank you for sharing your experience with Beauty Palace. Your feedback helps other clients discover our services.
+
+*Special Offer:* Enjoy 15% off your next appointment as a thank you! 🎁
+
+Book your next visit:
+📞 Call or WhatsApp us
+💻 Visit our website
+
+*Beauty Palace Team* 💕"""
+    ),
+}
+
+# Compiled once at import (app startup)
+message_templates = {
+    key: MessageTemplate(name, fields, body)
+    for key, (name, fields, body) in TEMPLATES.items()
+}
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_, event
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.outbox import WhatsAppOutbox
+from app.utils.whatsapp import whatsapp_service
+from app.utils.workers import WorkerPool
+import json
+import random
+import uuid
+
+
+def enqueue(to_phone, message_text=None, idempotency_key=None, template_name=None, template_params=None):
+    """Add a message to the outbox in the caller's transaction.
+
+    The caller commits; workers pick the row up after the commit. A message
+    whose idempotency key is already queued is not added again.
+    """
+    key = idempotency_key or f'message:{uuid.uuid4().hex}'
+
+    existing = WhatsAppOutbox.query.filter_by(idempotency_key=key).first()
+    if existing:
+        return existing
+
+    message = WhatsAppOutbox(
+        idempotency_key=key,
+        to_phone=to_phone,
+        message_text=message_text,
+        template_name=template_name,
+        template_params=json.dumps(template_params) if template_params else None
+    )
+
+    # Savepoint so a concurrent insert of the same key does not abort the caller's transaction
+    try:
+        with db.session.begin_nested():
+            db.session.add(message)
+    except IntegrityError:
+        return WhatsAppOutbox.query.filter_by(idempotency_key=key).first()
+
+    db.session.info['outbox_pending'] = True
+    return message
+
+
+@event.listens_for(db.session, 'after_commit')
+def _wake_workers(session):
+    if session.info.pop('outbox_pending', False):
+        outbox_worker.notify()
+
+
+class OutboxWorker(WorkerPool):
+    """Pool of background threads that drain the WhatsApp outbox"""
+
+    name = 'whatsapp-outbox'
+    workers_setting = 'OUTBOX_WORKERS'
+    poll_interval_setting = 'OUTBOX_POLL_INTERVAL_SECONDS'
+
+    model = WhatsAppOutbox
+    finished_statuses = ('sent', 'failed')
+    age_column = 'created_at'
+    retention_setting = 'OUTBOX_RETENTION_DAYS'
+
+    def claim_batch(self, limit):
+        """Lock due messages (skipping rows claimed by other workers) and mark them sending"""
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=current_app.config.get('OUTBOX_VISIBILITY_TIMEOUT_SECONDS', 300))
+
+        messages = WhatsAppOutbox.query.filter(or_(
+            and_(WhatsAppOutbox.status == 'pending', WhatsAppOutbox.next_attempt_at <= now),
+            and_(WhatsAppOutbox.status == 'sending', WhatsAppOutbox.locked_at < stale)
+        )).order_by(
+            WhatsAppOutbox.next_attempt_at.asc()
+        ).limit(limit).with_for_update(skip_locked=True).all()
+
+        for message in messages:
+            message.status = 'sending'
+            message.locked_at = now
+            message.attempts += 1
+
+        db.session.commit()
+        return messages
+
+    def retry_delay(self, attempts):
+        """Exponential backoff with jitter"""
+        base = current_app.config.get('OUTBOX_RETRY_BASE_SECONDS', 30)
+        cap = current_app.config.get('OUTBOX_RETRY_MAX_SECONDS', 3600)
+        return min(cap, base * 2 ** (attempts - 1)) + random.uniform(0, base)
+
+    def deliver(self, message):
+        try:
+            success = whatsapp_service.send_message(
+                message.to_phone,
+                message.message_text,
+                template_name=message.template_name,
+                template_params=message.params
+            )
+            error = None if success else 'WhatsApp API rejected the message'
+        except Exception as e:
+            success = False
+            error = str(e)
+
+        message.locked_at = None
+        if success:
+            message.status = 'sent'
+            message.sent_at = datetime.utcnow()
+            message.last_error = None
+        elif message.attempts >= current_app.config.get('OUTBOX_MAX_ATTEMPTS', 6):
+            message.status = 'failed'
+            message.last_error = error
+        else:
+            message.status = 'pending'
+            message.next_attempt_at = datetime.utcnow() + timedelta(seconds=self.retry_delay(message.attempts))
+            message.last_error = error
+
+        db.session.commit()
+        return success
+
+    def process_batch(self):
+        """Claim and deliver one batch; returns the number of messages handled"""
+        messages = self.claim_batch(current_app.config.get('OUTBOX_BATCH_SIZE', 20))
+        for message in messages:
+            self.deliver(message)
+        return len(messages)
+
+
+# Initialize outbox worker pool (threads start in create_app)
+outbox_worker = OutboxWorker()
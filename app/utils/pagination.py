@@ -0,0 +1,79 @@
+import base64
+import json
+from datetime import date, time, datetime
+from flask import Response, request, stream_with_context
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+
+def _to_json(value):
+    return value.isoformat() if isinstance(value, (date, time, datetime)) else value
+
+
+def _from_json(value, column):
+    python_type = column.type.python_type
+    if python_type in (date, time, datetime) and value is not None:
+        return python_type.fromisoformat(value)
+    return value
+
+
+def encode_cursor(row, columns):
+    """Opaque cursor holding the keyset values of the last row on a page"""
+    values = [_to_json(getattr(row, column.key)) for column in columns]
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if len(values) != len(columns):
+            raise ValueError
+        return [_from_json(value, column) for value, column in zip(values, columns)]
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def wants_stream():
+    """True when the client asked for newline-delimited JSON"""
+    return request.args.get('format') == 'ndjson'
+
+
+def wants_page():
+    return 'limit' in request.args or 'cursor' in request.args
+
+
+def page_size():
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    return max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+def order_by_keyset(query, columns, descending=False):
+    return query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+
+
+def keyset_page(query, columns, descending=False):
+    """Return (rows, next_cursor) for the page after ?cursor=, ordered by columns"""
+    limit = page_size()
+    cursor = request.args.get('cursor')
+
+    if cursor:
+        after = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        query = query.filter(key < tuple_(*after) if descending else key > tuple_(*after))
+
+    rows = order_by_keyset(query, columns, descending).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1], columns) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def stream_ndjson(query, serialize):
+    """Stream rows from a server-side cursor as NDJSON, one object per line"""
+    def generate():
+        rows = query.execution_options(stream_results=True).yield_per(STREAM_BATCH_SIZE)
+        for row in rows:
+            yield json.dumps(serialize(row)) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
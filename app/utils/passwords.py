@@ -0,0 +1,105 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from flask import current_app
+import bcrypt
+import multiprocessing
+import threading
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hashes queued; the request should be retried later (503)"""
+
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _checkpw(password, password_hash):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def hash_rounds(password_hash):
+    """Cost factor of a bcrypt hash ('$2b$12$...' -> 12)"""
+    try:
+        return int(password_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small process pool instead of the request thread.
+
+    A hash costs ~250ms of CPU at the default cost, so a login burst would
+    otherwise hold every request thread. At most PASSWORD_HASH_WORKERS hashes
+    run at once and PASSWORD_HASH_MAX_QUEUE more may wait; beyond that, or
+    when a hash takes longer than PASSWORD_HASH_TIMEOUT_SECONDS,
+    PasswordHasherBusy is raised and the app answers 503.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # Spawned, not forked: the app process runs scheduler and worker threads.
+                    # Children only import this module (no create_app); run.py builds
+                    # the app under its __main__ guard, so re-importing it is harmless.
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=current_app.config.get('PASSWORD_HASH_WORKERS', 2),
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._executor
+
+    def _run(self, fn, *args):
+        config = current_app.config
+        limit = config.get('PASSWORD_HASH_WORKERS', 2) + config.get('PASSWORD_HASH_MAX_QUEUE', 32)
+
+        with self._lock:
+            if self.in_flight >= limit:
+                self.rejected += 1
+                raise PasswordHasherBusy('Too many login attempts in progress, please try again')
+            self.in_flight += 1
+
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        try:
+            return future.result(timeout=config.get('PASSWORD_HASH_TIMEOUT_SECONDS', 10))
+        except TimeoutError:
+            # The pool is backed up: give up on this hash (if it has not started) and answer 503
+            future.cancel()
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy('Login is taking too long, please try again')
+
+    def _done(self, future):
+        with self._lock:
+            self.in_flight -= 1
+
+    def rounds(self):
+        return current_app.config.get('PASSWORD_HASH_ROUNDS', 12)
+
+    def hash(self, password):
+        return self._run(_hashpw, password, self.rounds())
+
+    def check(self, password, password_hash):
+        return self._run(_checkpw, password, password_hash)
+
+    def needs_rehash(self, password_hash):
+        return hash_rounds(password_hash) != self.rounds()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+# Initialize password hasher (pool starts on first use)
+password_hasher = PasswordHasher()
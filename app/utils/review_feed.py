@@ -0,0 +1,173 @@
+import bisect
+import json
+import threading
+import time as clock
+from types import SimpleNamespace
+from flask import current_app, request
+from app.models.review import Review
+from app.utils.pagination import page_size, encode_cursor, decode_cursor
+
+RATINGS = (1, 2, 3, 4, 5)
+KEYSET = [Review.created_at, Review.id]
+
+
+def feed_key(created_at, review_id):
+    """Sort key putting the newest review first"""
+    return (-created_at.timestamp(), -review_id)
+
+
+class ReviewFeed:
+    """Approved reviews kept newest-first as pre-serialized JSON, plus
+    per-service rating histograms.
+
+    Loaded with one query, then updated in place by update_review_status, so
+    the public feed and the rating summary never touch the database. The
+    whole feed is reloaded after REVIEW_FEED_TTL_SECONDS to pick up changes
+    made by other workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded_at = None
+        self._keys = []
+        self._fragments = []
+        self._reviews = {}
+        self._histograms = {}
+        self._all_json = None
+        self._summary_json = None
+
+    def _ensure_loaded(self):
+        ttl = current_app.config.get('REVIEW_FEED_TTL_SECONDS', 300)
+        if self._loaded_at is None or clock.monotonic() - self._loaded_at > ttl:
+            self.reload()
+
+    def reload(self):
+        reviews = Review.query_with_details().filter_by(status='approved').all()
+
+        with self._lock:
+            self._keys = []
+            self._fragments = []
+            self._reviews = {}
+            self._histograms = {}
+            for review in sorted(reviews, key=lambda r: feed_key(r.created_at, r.id)):
+                self._append(review)
+            self._changed()
+            self._loaded_at = clock.monotonic()
+
+    def _serialize(self, review):
+        return current_app.json.dumps(review.to_dict())
+
+    def _append(self, review):
+        self._keys.append(feed_key(review.created_at, review.id))
+        self._fragments.append(self._serialize(review))
+        self._count(review.id, review.service_name, review.rating, review.created_at)
+
+    def _count(self, review_id, service_name, rating, created_at):
+        self._reviews[review_id] = (service_name, rating, created_at)
+        histogram = self._histograms.setdefault(service_name, [0] * len(RATINGS))
+        if rating in RATINGS:
+            histogram[rating - 1] += 1
+
+    def _changed(self):
+        self._all_json = None
+        self._summary_json = None
+
+    def add(self, review):
+        """Insert or refresh an approved review"""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self.remove(review.id)
+
+            key = feed_key(review.created_at, review.id)
+            pos = bisect.bisect_left(self._keys, key)
+            self._keys.insert(pos, key)
+            self._fragments.insert(pos, self._serialize(review))
+            self._count(review.id, review.service_name, review.rating, review.created_at)
+            self._changed()
+
+    def remove(self, review_id):
+        """Drop a review that is no longer approved"""
+        with self._lock:
+            entry = self._reviews.pop(review_id, None)
+            if entry is None:
+                return
+
+            service_name, rating, created_at = entry
+            pos = bisect.bisect_left(self._keys, feed_key(created_at, review_id))
+            if pos < len(self._keys) and self._keys[pos] == feed_key(created_at, review_id):
+                del self._keys[pos]
+                del self._fragments[pos]
+
+            histogram = self._histograms[service_name]
+            if rating in RATINGS:
+                histogram[rating - 1] -= 1
+            if not any(histogram):
+                del self._histograms[service_name]
+            self._changed()
+
+    def update(self, review):
+        """Apply a status change made by update_review_status"""
+        if review.status == 'approved':
+            self.add(review)
+        else:
+            self.remove(review.id)
+
+    def all_json(self):
+        """Every approved review as one JSON array (the original /api/reviews/ body)"""
+        self._ensure_loaded()
+        with self._lock:
+            if self._all_json is None:
+                self._all_json = '[' + ','.join(self._fragments) + ']'
+            return self._all_json
+
+    def page_json(self):
+        """Keyset page for ?limit=/&cursor=, assembled from pre-serialized reviews"""
+        self._ensure_loaded()
+        limit = page_size()
+        cursor = request.args.get('cursor')
+
+        with self._lock:
+            pos = 0
+            if cursor:
+                created_at, review_id = decode_cursor(cursor, KEYSET)
+                pos = bisect.bisect_right(self._keys, feed_key(created_at, review_id))
+
+            fragments = self._fragments[pos:pos + limit]
+            next_cursor = None
+            if pos + limit < len(self._fragments):
+                review_id = -self._keys[pos + limit - 1][1]
+                created_at = self._reviews[review_id][2]
+                next_cursor = encode_cursor(SimpleNamespace(created_at=created_at, id=review_id), KEYSET)
+
+        return '{"reviews":[' + ','.join(fragments) + '],"next_cursor":' + json.dumps(next_cursor) + '}'
+
+    def summary_json(self):
+        """Per-service rating histograms and averages"""
+        self._ensure_loaded()
+        with self._lock:
+            if self._summary_json is None:
+                services = {
+                    name: summarize(histogram)
+                    for name, histogram in sorted(self._histograms.items())
+                }
+                overall = [sum(h[i] for h in self._histograms.values()) for i in range(len(RATINGS))]
+                self._summary_json = current_app.json.dumps({
+                    'services': services,
+                    'overall': summarize(overall)
+                })
+            return self._summary_json
+
+
+def summarize(histogram):
+    count = sum(histogram)
+    total = sum(rating * n for rating, n in zip(RATINGS, histogram))
+    return {
+        'count': count,
+        'average': round(total / count, 2) if count else None,
+        'histogram': {str(rating): n for rating, n in zip(RATINGS, histogram)}
+    }
+
+
+# Initialize feed (loaded on first request)
+review_feed = ReviewFeed()
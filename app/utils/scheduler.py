@@ -1,85 +1,429 @@
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.triggers.date import DateTrigger
+from collections import defaultdict
 from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, text
 from app import db
 from app.models.appointment import Appointment
 from app.utils.whatsapp import whatsapp_service
 import atexit
+import pytz
+import threading
+
+# Postgres advisory lock key held by the process that fires reminders
+REMINDER_LEADER_LOCK = 0x62707231
+
+
+def starts_after(moment):
+    """Appointments starting strictly after `moment` (date/time columns, index-friendly)"""
+    return or_(
+        Appointment.appointment_date > moment.date(),
+        and_(Appointment.appointment_date == moment.date(), Appointment.appointment_time > moment.time())
+    )
+
+
+def starts_by(moment):
+    """Appointments starting at or before `moment`"""
+    return or_(
+        Appointment.appointment_date < moment.date(),
+        and_(Appointment.appointment_date == moment.date(), Appointment.appointment_time <= moment.time())
+    )
+
+
+def send_reminder_job(appointment_id):
+    """Scheduler entry point (module level so persisted jobs can reference it)"""
+    appointment_scheduler.send_reminder(appointment_id)
+
+
+def sweep_reminders_job():
+    """Scheduler entry point for sweeper mode"""
+    appointment_scheduler.sweep_reminders()
+
+
+def prune_queues_job():
+    """Scheduler entry point for outbox and inbound retention"""
+    appointment_scheduler.prune_queues()
+
+
+def leader_heartbeat_job():
+    """Wakes the scheduler so jobs added by other processes are picked up, and checks the lock"""
+    appointment_scheduler.check_leadership()
+
 
 class AppointmentScheduler:
+    """Reminder scheduler backed by a persistent job store.
+
+    Every process adds jobs to the shared `apscheduler_jobs` table, but only
+    the process holding the leader advisory lock runs them; the others keep
+    their scheduler paused and retry the lock periodically.
+
+    In 'sweeper' mode (the default) there are no per-appointment jobs: the
+    leader wakes every REMINDER_SWEEP_SECONDS, loads only the appointments
+    with a reminder due before the next sweep in one joined query, queues
+    them as a batch and records the lead on `last_reminder_lead`. In 'jobs' mode each
+    appointment gets its own date job, and a new leader rehydrates missing
+    ones with one query. The leader also prunes the WhatsApp outbox and
+    inbound queues every QUEUE_PRUNE_INTERVAL_SECONDS.
+    """
+
     def __init__(self):
-        self.scheduler = BackgroundScheduler()
-        self.scheduler.start()
-        atexit.register(lambda: self.scheduler.shutdown())
-    
+        self.app = None
+        self.scheduler = None
+        self.is_leader = False
+        self._lock_connection = None
+        self._leader_lock = threading.Lock()
+        self._retry_timer = None
+
+    def init_app(self, app):
+        if self.scheduler is not None:
+            return
+
+        self.app = app
+        self.mode = app.config.get('REMINDER_MODE', 'sweeper')
+        self.leads = sorted(app.config.get('REMINDER_LEADS_MINUTES', [60]))
+        self.timezone = pytz.timezone(app.config.get('SCHEDULER_TIMEZONE', 'Asia/Kolkata'))
+
+        with app.app_context():
+            engine = db.engine
+
+        self.scheduler = BackgroundScheduler(
+            jobstores={
+                'default': SQLAlchemyJobStore(
+                    engine=engine,
+                    tablename=app.config.get('SCHEDULER_JOBSTORE_TABLE', 'apscheduler_jobs')
+                ),
+                'local': MemoryJobStore()
+            },
+            job_defaults={
+                'coalesce': True,
+                'misfire_grace_time': app.config.get('SCHEDULER_MISFIRE_GRACE_SECONDS', 1800)
+            },
+            timezone=self.timezone
+        )
+
+        # Started paused: jobs can be added to the shared store, but only the leader runs them
+        self.scheduler.start(paused=True)
+        self.scheduler.add_job(
+            leader_heartbeat_job,
+            'interval',
+            seconds=app.config.get('SCHEDULER_WAKEUP_SECONDS', 30),
+            id='leader_heartbeat',
+            jobstore='local',
+            replace_existing=True
+        )
+        if self.mode == 'sweeper':
+            self.scheduler.add_job(
+                sweep_reminders_job,
+                'interval',
+                seconds=app.config.get('REMINDER_SWEEP_SECONDS', 60),
+                id='reminder_sweeper',
+                jobstore='local',
+                replace_existing=True
+            )
+        self.scheduler.add_job(
+            prune_queues_job,
+            'interval',
+            seconds=app.config.get('QUEUE_PRUNE_INTERVAL_SECONDS', 3600),
+            id='queue_pruner',
+            jobstore='local',
+            replace_existing=True
+        )
+        atexit.register(self.shutdown)
+
+        self.try_become_leader()
+
+    def shutdown(self):
+        if self._retry_timer:
+            self._retry_timer.cancel()
+        if self.scheduler and self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+        self._release_lock()
+
+    def prune_queues(self):
+        """Delete finished outbox messages and webhook payloads past their retention"""
+        from app.utils.outbox import outbox_worker
+        from app.utils.inbound import inbound_worker
+
+        with self.app.app_context():
+            try:
+                for pool in (outbox_worker, inbound_worker):
+                    try:
+                        deleted = pool.prune()
+                        if deleted:
+                            self.app.logger.info(f"Pruned {deleted} {pool.name} rows")
+                    except Exception as e:
+                        db.session.rollback()
+                        self.app.logger.error(f"Error pruning {pool.name}: {str(e)}")
+            finally:
+                db.session.remove()
+
+    def now(self):
+        """Current wall-clock time in the salon's timezone (naive, like appointment columns)"""
+        return datetime.now(self.timezone).replace(tzinfo=None)
+
+    # Leader election
+
+    def _acquire_lock(self):
+        with self.app.app_context():
+            engine = db.engine
+
+        if engine.dialect.name != 'postgresql':
+            # SQLite/dev servers run a single process
+            return True
+
+        # Autocommit: without it the lock query opens a transaction that stays idle
+        # for the life of the process, pinning vacuum and tripping
+        # idle_in_transaction_session_timeout. The session-level lock needs none.
+        connection = engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        try:
+            acquired = connection.execute(
+                text('SELECT pg_try_advisory_lock(:key)'), {'key': REMINDER_LEADER_LOCK}
+            ).scalar()
+        except Exception:
+            connection.close()
+            raise
+
+        if acquired:
+            # Session-level lock: held for as long as this connection stays open
+            self._lock_connection = connection
+        else:
+            connection.close()
+        return bool(acquired)
+
+    def _release_lock(self):
+        if self._lock_connection is not None:
+            try:
+                self._lock_connection.close()
+            except Exception:
+                pass
+            self._lock_connection = None
+
+    def try_become_leader(self):
+        with self._leader_lock:
+            if self.is_leader:
+                return True
+
+            try:
+                acquired = self._acquire_lock()
+            except Exception as e:
+                self.app.logger.error(f"Scheduler leader election failed: {str(e)}")
+                acquired = False
+
+            if acquired:
+                self.is_leader = True
+                self.app.logger.info("This process is the reminder scheduler leader")
+                if self.mode == 'jobs':
+                    self.rehydrate()
+                self.scheduler.resume()
+            else:
+                self._schedule_retry()
+            return acquired
+
+    def _schedule_retry(self):
+        self._retry_timer = threading.Timer(
+            self.app.config.get('SCHEDULER_LEADER_RETRY_SECONDS', 30),
+            self.try_become_leader
+        )
+        self._retry_timer.daemon = True
+        self._retry_timer.start()
+
+    def check_leadership(self):
+        """Step down if the lock connection died, so two processes never fire reminders"""
+        if not self.is_leader or self._lock_connection is None:
+            return
+
+        try:
+            # Autocommit connection, so the probe leaves no transaction open
+            self._lock_connection.execute(text('SELECT 1'))
+        except Exception as e:
+            self.app.logger.error(f"Lost scheduler leader lock: {str(e)}")
+            with self._leader_lock:
+                self.is_leader = False
+                self._release_lock()
+                self.scheduler.pause()
+            self._schedule_retry()
+
+    # Reminders
+
+    def reminder_time(self, appointment_date, appointment_time):
+        """Fire time of the (single, shortest-lead) reminder in jobs mode"""
+        return datetime.combine(appointment_date, appointment_time) - timedelta(minutes=self.leads[0])
+
+    def due_lead(self, start, until):
+        """Shortest lead whose reminder time falls at or before `until`, or None"""
+        for lead in self.leads:
+            if start - timedelta(minutes=lead) <= until:
+                return lead
+        return None
+
+    def reminder_key(self, appointment, lead):
+        return (
+            f"appointment:{appointment.id}:reminder:{lead}:"
+            f"{appointment.appointment_date.isoformat()}T{appointment.appointment_time.strftime('%H:%M')}"
+        )
+
+    def _queue_reminder(self, appointment, lead):
+        return whatsapp_service.send_appointment_reminder(
+            client_name=appointment.user.name,
+            client_phone=appointment.user.phone,
+            service_name=appointment.service.name,
+            appointment_date=appointment.appointment_date,
+            appointment_time=appointment.appointment_time,
+            idempotency_key=self.reminder_key(appointment, lead),
+            lead_minutes=lead
+        )
+
+    def sweep_reminders(self):
+        """Queue every reminder due before the next sweep, in one query and one commit"""
+        now = self.now()
+        until = now + timedelta(seconds=self.app.config.get('REMINDER_SWEEP_SECONDS', 60))
+
+        # A lead is due when the appointment starts within `lead` of the next sweep
+        # and no reminder that short has gone out yet; anything a missed sweep
+        # skipped is still due, so downtime delays reminders instead of dropping them
+        due = or_(*(
+            and_(
+                starts_by(until + timedelta(minutes=lead)),
+                or_(Appointment.last_reminder_lead.is_(None), Appointment.last_reminder_lead > lead)
+            )
+            for lead in self.leads
+        ))
+
+        with self.app.app_context():
+            try:
+                appointments = Appointment.query_with_details().filter(
+                    Appointment.status == 'upcoming',
+                    starts_after(now),
+                    due
+                ).all()
+
+                sent = defaultdict(list)
+                for appointment in appointments:
+                    # Every row has some lead due; send only the shortest one
+                    start = datetime.combine(appointment.appointment_date, appointment.appointment_time)
+                    lead = self.due_lead(start, until)
+                    if lead is None:
+                        continue
+                    if appointment.last_reminder_lead is not None and appointment.last_reminder_lead <= lead:
+                        continue
+
+                    self._queue_reminder(appointment, lead)
+                    sent[lead].append(appointment.id)
+
+                for lead, ids in sent.items():
+                    Appointment.query.filter(Appointment.id.in_(ids)).update(
+                        {Appointment.last_reminder_lead: lead},
+                        synchronize_session=False
+                    )
+                db.session.commit()
+
+                total = sum(len(ids) for ids in sent.values())
+                if total:
+                    self.app.logger.info(f"Queued {total} reminders")
+                return total
+
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error(f"Error sweeping reminders: {str(e)}")
+                return 0
+            finally:
+                db.session.remove()
+
+    def _add_reminder_job(self, appointment_id, reminder_time):
+        self.scheduler.add_job(
+            func=send_reminder_job,
+            trigger=DateTrigger(run_date=reminder_time, timezone=self.timezone),
+            args=[appointment_id],
+            id=f"reminder_{appointment_id}",
+            replace_existing=True
+        )
+
+    def rehydrate(self):
+        """Make sure every upcoming appointment has a reminder job (one query)"""
+        now = self.now()
+
+        with self.app.app_context():
+            rows = db.session.query(
+                Appointment.id,
+                Appointment.appointment_date,
+                Appointment.appointment_time
+            ).filter(
+                Appointment.status == 'upcoming',
+                Appointment.appointment_date >= now.date()
+            ).all()
+            db.session.remove()
+
+        existing = {job.id for job in self.scheduler.get_jobs(jobstore='default')}
+        restored = 0
+
+        for appointment_id, appointment_date, appointment_time in rows:
+            reminder_time = self.reminder_time(appointment_date, appointment_time)
+            if reminder_time > now and f"reminder_{appointment_id}" not in existing:
+                self._add_reminder_job(appointment_id, reminder_time)
+                restored += 1
+
+        self.app.logger.info(f"Rehydrated {restored} reminders ({len(rows)} upcoming appointments)")
+        return restored
+
     def schedule_reminder(self, appointment_id):
-        """Schedule a reminder 1 hour before appointment"""
+        """Schedule reminders for a new, rescheduled or reactivated appointment"""
         try:
+            if self.scheduler is None:
+                return False
+
             appointment = Appointment.query.get(appointment_id)
             if not appointment or appointment.status != 'upcoming':
                 return False
-            
-            # Calculate reminder time (1 hour before appointment)
-            appointment_datetime = datetime.combine(
-                appointment.appointment_date,
-                appointment.appointment_time
-            )
-            reminder_time = appointment_datetime - timedelta(hours=1)
-            
+
+            if self.mode == 'sweeper':
+                # Windows the appointment is already inside count as covered by the
+                # confirmation, so a booking 3 hours out gets only the 1-hour reminder
+                start = datetime.combine(appointment.appointment_date, appointment.appointment_time)
+                appointment.last_reminder_lead = self.due_lead(start, self.now())
+                db.session.commit()
+                return appointment.last_reminder_lead != self.leads[0]
+
+            reminder_time = self.reminder_time(appointment.appointment_date, appointment.appointment_time)
+
             # Only schedule if reminder time is in the future
-            if reminder_time > datetime.now():
-                job_id = f"reminder_{appointment_id}"
-                
-                # Remove existing job if any
-                try:
-                    self.scheduler.remove_job(job_id)
-                except:
-                    pass
-                
-                # Schedule new reminder
-                self.scheduler.add_job(
-                    func=self._send_reminder,
-                    trigger=DateTrigger(run_date=reminder_time),
-                    args=[appointment_id],
-                    id=job_id,
-                    replace_existing=True
-                )
-                
+            if reminder_time > self.now():
+                self._add_reminder_job(appointment_id, reminder_time)
                 print(f"Reminder scheduled for appointment {appointment_id} at {reminder_time}")
                 return True
-            
+
             return False
-            
+
         except Exception as e:
             print(f"Error scheduling reminder: {str(e)}")
             return False
-    
-    def _send_reminder(self, appointment_id):
-        """Send reminder message (called by scheduler)"""
-        try:
-            appointment = Appointment.query.get(appointment_id)
-            if not appointment or appointment.status != 'upcoming':
-                return
-            
-            # Send WhatsApp reminder
-            success = whatsapp_service.send_appointment_reminder(
-                client_name=appointment.user.name,
-                client_phone=appointment.user.phone,
-                service_name=appointment.service.name,
-                appointment_date=appointment.appointment_date,
-                appointment_time=appointment.appointment_time
-            )
-            
-            if success:
-                print(f"Reminder sent successfully for appointment {appointment_id}")
-            else:
-                print(f"Failed to send reminder for appointment {appointment_id}")
-                
-        except Exception as e:
-            print(f"Error sending reminder: {str(e)}")
-    
+
+    def send_reminder(self, appointment_id):
+        """Queue the reminder message (called by the scheduler on the leader)"""
+        with self.app.app_context():
+            try:
+                appointment = Appointment.query_with_details().get(appointment_id)
+                if not appointment or appointment.status != 'upcoming':
+                    return
+
+                # Keyed on the slot, so a reminder fired twice is still sent once
+                self._queue_reminder(appointment, self.leads[0])
+                db.session.commit()
+                print(f"Reminder queued for appointment {appointment_id}")
+
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error sending reminder: {str(e)}")
+            finally:
+                db.session.remove()
+
     def cancel_reminder(self, appointment_id):
         """Cancel scheduled reminder"""
+        if self.mode == 'sweeper':
+            # The sweeper only picks up upcoming appointments
+            return True
+
         try:
             job_id = f"reminder_{appointment_id}"
             self.scheduler.remove_job(job_id)
@@ -87,11 +431,11 @@ class AppointmentScheduler:
             return True
         except:
             return False
-    
+
     def reschedule_reminder(self, appointment_id):
         """Reschedule reminder for updated appointment"""
         self.cancel_reminder(appointment_id)
         return self.schedule_reminder(appointment_id)
 
-# Initialize scheduler
+# Initialize scheduler (started by create_app via init_app)
 appointment_scheduler = AppointmentScheduler()
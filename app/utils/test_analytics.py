@@ -0,0 +1,41 @@
+from datetime import date
+import numpy as np
+from app.utils.analytics import AppointmentArrays, CANCELLED, COMPLETED, UPCOMING, hour_of_week_occupancy, service_trends
+
+# Monday
+START = date(2024, 12, 23)
+
+
+def arrays(*rows):
+    """rows of (day, minute, status, service, price, duration)"""
+    columns = list(zip(*rows))
+    batch = tuple(np.array(column, dtype) for column, (_, dtype) in zip(columns, AppointmentArrays.COLUMNS))
+    return AppointmentArrays(START, [batch], service_ids=[10, 20])
+
+
+def test_occupancy_spreads_duration_over_hours_and_skips_cancelled():
+    data = arrays(
+        (0, 9 * 60, COMPLETED, 0, 60.0, 90),     # Monday 09:00-10:30
+        (0, 9 * 60, CANCELLED, 1, 40.0, 60),
+        (6, 23 * 60 + 30, UPCOMING, 1, 40.0, 60),  # Sunday 23:30, wraps into Monday 00:00
+    )
+    occupancy = hour_of_week_occupancy(data, days=7, chairs=1)
+    assert occupancy.shape == (7, 24)
+    assert occupancy[0, 9] == 1.0
+    assert occupancy[0, 10] == 0.5
+    assert occupancy[6, 23] == 0.5
+    assert occupancy[0, 0] == 0.5
+    assert occupancy.sum() == 2.5
+
+
+def test_service_trends_count_bookings_and_completed_revenue_per_week():
+    data = arrays(
+        (0, 600, COMPLETED, 0, 60.0, 60),
+        (8, 600, COMPLETED, 0, 60.0, 60),
+        (9, 600, UPCOMING, 0, 60.0, 60),
+        (1, 600, CANCELLED, 1, 40.0, 60),
+    )
+    bookings, revenue, slope = service_trends(data, weeks=2)
+    assert bookings.tolist() == [[1, 2], [0, 0]]
+    assert revenue.tolist() == [[60.0, 60.0], [0.0, 0.0]]
+    assert slope.tolist() == [1.0, 0.0]
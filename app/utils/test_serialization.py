@@ -0,0 +1,100 @@
+from flask import Flask
+from sqlalchemy import event
+from datetime import date, time
+from app import db
+from app.models import User, Service, Appointment, Review, ReviewImage
+from app.utils.calendar_feed import calendar_payload
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+
+def seed(count):
+    """Create `count` users, each with one appointment and one review with two images"""
+    service = Service(name='Signature Haircut', description='Cut', price=60.0, duration=60)
+    db.session.add(service)
+    for i in range(count):
+        user = User(name=f'Client {i}', phone=f'90000{i:05d}')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Appointment(
+            user_id=user.id,
+            service_id=service.id,
+            appointment_date=date(2024, 12, 25),
+            appointment_time=time(9 + i % 8, 0)
+        ))
+        review = Review(user_id=user.id, service_name=service.name, rating=5, comment='Lovely', status='approved')
+        db.session.add(review)
+        db.session.flush()
+        db.session.add(ReviewImage(review_id=review.id, image_path=f'/api/uploads/reviews/{i}_a.jpg'))
+        db.session.add(ReviewImage(review_id=review.id, image_path=f'/api/uploads/reviews/{i}_b.jpg'))
+    db.session.commit()
+
+
+def count_queries(fn):
+    """Run fn() and return how many SQL statements it executed"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return len(statements)
+
+
+def serialized_query_count(count, query_factory):
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        seed(count)
+        db.session.expire_all()
+        return count_queries(lambda: [row.to_dict() for row in query_factory().all()])
+
+
+def test_appointment_listing_query_count_is_constant():
+    small = serialized_query_count(2, Appointment.query_with_details)
+    large = serialized_query_count(25, Appointment.query_with_details)
+    assert small == large == 1
+
+
+def test_review_listing_query_count_is_constant():
+    small = serialized_query_count(2, Review.query_with_details)
+    large = serialized_query_count(25, Review.query_with_details)
+    assert small == large == 2
+
+
+def calendar_query_count(count):
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        seed(count)
+        payload = {}
+        queries = count_queries(lambda: payload.update(calendar_payload(date(2024, 12, 23), date(2024, 12, 29))))
+        return queries, payload
+
+
+def test_calendar_payload_is_one_query_and_dictionary_encoded():
+    queries, payload = calendar_query_count(25)
+    assert queries == 1
+
+    appointments = payload['appointments']
+    assert len(appointments['id']) == 25
+    assert payload['services']['name'] == ['Signature Haircut']
+    assert len(payload['users']['id']) == 25
+    # 2024-12-25 09:00 is two days and nine hours after 2024-12-23 00:00
+    assert appointments['start'][0] == (2 * 24 + 9) * 60
+    assert {payload['statuses'][i] for i in appointments['status']} == {'upcoming'}
+
+
+if __name__ == "__main__":
+    for n in (1, 10, 100):
+        print(f"N={n}: appointments={serialized_query_count(n, Appointment.query_with_details)} "
+              f"reviews={serialized_query_count(n, Review.query_with_details)} queries")
@@ -1,8 +1,10 @@
+from app import create_app, db
 from app.utils.whatsapp import whatsapp_service
 from datetime import datetime, time, date
 
 def test_whatsapp_integration():
-    """Test WhatsApp integration with sample data"""
+    """Test WhatsApp integration with sample data (queued via the outbox)"""
+    run = datetime.now().strftime('%Y%m%d%H%M%S')
     
     # Test booking confirmation
     print("Testing booking confirmation...")
@@ -12,7 +14,8 @@ def test_whatsapp_integration():
         service_name="Haircut & Styling",
         appointment_date=date(2024, 12, 25),
         appointment_time=time(14, 30),
-        duration=60
+        duration=60,
+        idempotency_key=f'test:{run}:confirmation'
     )
     print(f"Booking confirmation: {'✅ Success' if success else '❌ Failed'}")
     
@@ -24,7 +27,8 @@ def test_whatsapp_integration():
         service_name="Haircut & Styling",
         appointment_date=date(2024, 12, 25),
         appointment_time=time(14, 30),
-        duration=60
+        duration=60,
+        idempotency_key=f'test:{run}:owner'
     )
     print(f"Owner notification: {'✅ Success' if success else '❌ Failed'}")
     
@@ -35,7 +39,8 @@ def test_whatsapp_integration():
         client_phone="919876543210",
         service_name="Haircut & Styling",
         appointment_date=date(2024, 12, 25),
-        appointment_time=time(14, 30)
+        appointment_time=time(14, 30),
+        idempotency_key=f'test:{run}:reminder'
     )
     print(f"Appointment reminder: {'✅ Success' if success else '❌ Failed'}")
     
@@ -44,9 +49,14 @@ def test_whatsapp_integration():
     success = whatsapp_service.send_review_thank_you(
         client_name="Test Client",
         client_phone="919876543210",
-        rating=5
+        rating=5,
+        idempotency_key=f'test:{run}:thank_you'
     )
     print(f"Review thank you: {'✅ Success' if success else '❌ Failed'}")
+    
+    # Outbox workers (this process or a running server) deliver them once committed
+    db.session.commit()
 
 if __name__ == "__main__":
-    test_whatsapp_integration()
+    with create_app().app_context():
+        test_whatsapp_integration()
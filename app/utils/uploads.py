@@ -0,0 +1,65 @@
+import os
+import posixpath
+import time
+from flask import current_app
+from sqlalchemy import event, func, select
+from app import db
+from app.models.review import ReviewImage
+from app.utils.file_upload import delete_stored_file
+
+# Public URL prefix of stored review images -> folder under UPLOAD_FOLDER
+UPLOAD_URL_PREFIX = '/api/uploads/'
+
+
+def stored_location(image_path):
+    """('uploads/reviews', '<sha256>.jpg') for '/api/uploads/reviews/<sha256>.jpg'"""
+    if not image_path.startswith(UPLOAD_URL_PREFIX):
+        return None
+    folder, filename = posixpath.split(image_path[len(UPLOAD_URL_PREFIX):])
+    return os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), folder), filename
+
+
+def reference_count(connection, image_path):
+    """How many review_images rows point at the stored file"""
+    return connection.execute(
+        select(func.count()).select_from(ReviewImage.__table__).where(ReviewImage.image_path == image_path)
+    ).scalar()
+
+
+@event.listens_for(db.session, 'after_flush')
+def _track_released_images(session, flush_context):
+    released = [obj.image_path for obj in session.deleted if isinstance(obj, ReviewImage)]
+    if released:
+        session.info.setdefault('released_images', set()).update(released)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_released_images(session):
+    session.info.pop('released_images', None)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _delete_unreferenced_images(session):
+    """Delete files whose last review_images row was just deleted.
+
+    Files touched within UPLOAD_GC_GRACE_SECONDS are kept: a concurrent
+    upload of the same image may have reused it before its row committed.
+    """
+    released = session.info.pop('released_images', None)
+    if not released:
+        return
+
+    grace = current_app.config.get('UPLOAD_GC_GRACE_SECONDS', 300)
+    with db.engine.connect() as connection:
+        for image_path in released:
+            location = stored_location(image_path)
+            if location is None or reference_count(connection, image_path):
+                continue
+
+            upload_path, filename = location
+            try:
+                if time.time() - os.path.getmtime(os.path.join(upload_path, filename)) < grace:
+                    continue
+            except FileNotFoundError:
+                continue
+            delete_stored_file(upload_path, filename)
@@ -1,62 +1,155 @@
+import asyncio
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import threading
+import time
 from datetime import datetime, timedelta
 from flask import current_app
+from app.utils.metrics import metrics
+from app.utils.message_templates import message_templates, format_date, format_time, format_lead
 import json
 
+class AsyncTokenBucket:
+    """Token bucket limiting sends to `rate` per second with bursts up to `capacity`"""
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+    
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
 class WhatsAppService:
     def __init__(self):
         self.api_url = "https://graph.facebook.com/v18.0"
         self.phone_number_id = os.environ.get('WHATSAPP_PHONE_NUMBER_ID')
         self.access_token = os.environ.get('WHATSAPP_ACCESS_TOKEN')
         self.owner_phone = os.environ.get('OWNER_WHATSAPP_NUMBER', '1234567890')
+        self._session = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """Shared keep-alive session, built on first use from the app config"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._build_session(current_app.config)
+        return self._session
+    
+    def _build_session(self, config):
+        session = requests.Session()
+        session.headers.update({
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json',
+            'Connection': 'keep-alive'
+        })
+        
+        # pool_maxsize caps connections per host; pool_block makes extra senders
+        # wait for a free connection instead of opening throwaway ones
+        adapter = HTTPAdapter(
+            pool_connections=config.get('WHATSAPP_POOL_CONNECTIONS', 2),
+            pool_maxsize=config.get('WHATSAPP_POOL_MAXSIZE', 10),
+            pool_block=config.get('WHATSAPP_POOL_BLOCK', True),
+            # Only retry failed connects; a POST that reached the API is never resent here
+            max_retries=Retry(
+                total=None,
+                connect=config.get('WHATSAPP_CONNECT_RETRIES', 2),
+                read=0,
+                redirect=0,
+                status=0,
+                other=0,
+                backoff_factor=0.2
+            )
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.hooks['response'].append(self._count_response)
+        return session
+    
+    @staticmethod
+    def _count_response(response, *args, **kwargs):
+        metrics.count_outbound('whatsapp')
+    
+    @staticmethod
+    async def _count_request(request):
+        metrics.count_outbound('whatsapp')
+    
+    def _timeout(self):
+        config = current_app.config
+        return (config.get('WHATSAPP_CONNECT_TIMEOUT', 5), config.get('WHATSAPP_READ_TIMEOUT', 30))
+    
+    def close(self):
+        """Close pooled connections (the session is rebuilt on next send)"""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+        
+    @staticmethod
+    def clean_phone(to_phone):
+        """Strip non-digits and add the India country code to 10-digit numbers"""
+        clean_phone = ''.join(filter(str.isdigit, to_phone))
         
+        if not clean_phone.startswith('91') and len(clean_phone) == 10:
+            clean_phone = '91' + clean_phone
+        
+        return clean_phone
+    
+    @staticmethod
+    def build_payload(clean_phone, message_text, template_name=None, template_params=None):
+        if template_name and template_params:
+            # Use WhatsApp Business Template
+            return {
+                "messaging_product": "whatsapp",
+                "to": clean_phone,
+                "type": "template",
+                "template": {
+                    "name": template_name,
+                    "language": {"code": "en"},
+                    "components": [
+                        {
+                            "type": "body",
+                            "parameters": template_params
+                        }
+                    ]
+                }
+            }
+        
+        # Send text message
+        return {
+            "messaging_product": "whatsapp",
+            "to": clean_phone,
+            "type": "text",
+            "text": {"body": message_text}
+        }
+    
     def send_message(self, to_phone, message_text, template_name=None, template_params=None):
         """Send WhatsApp message using Facebook Graph API"""
         try:
-            # Clean phone number (remove non-digits)
-            clean_phone = ''.join(filter(str.isdigit, to_phone))
+            clean_phone = self.clean_phone(to_phone)
+            payload = self.build_payload(clean_phone, message_text, template_name, template_params)
             
-            # Add country code if not present (assuming India +91)
-            if not clean_phone.startswith('91') and len(clean_phone) == 10:
-                clean_phone = '91' + clean_phone
-            
-            headers = {
-                'Authorization': f'Bearer {self.access_token}',
-                'Content-Type': 'application/json'
-            }
-            
-            if template_name and template_params:
-                # Use WhatsApp Business Template
-                payload = {
-                    "messaging_product": "whatsapp",
-                    "to": clean_phone,
-                    "type": "template",
-                    "template": {
-                        "name": template_name,
-                        "language": {"code": "en"},
-                        "components": [
-                            {
-                                "type": "body",
-                                "parameters": template_params
-                            }
-                        ]
-                    }
-                }
-            else:
-                # Send text message
-                payload = {
-                    "messaging_product": "whatsapp",
-                    "to": clean_phone,
-                    "type": "text",
-                    "text": {"body": message_text}
-                }
-            
-            response = requests.post(
+            response = self.session.post(
                 f"{self.api_url}/{self.phone_number_id}/messages",
-                headers=headers,
                 json=payload,
-                timeout=30
+                timeout=self._timeout()
             )
             
             if response.status_code == 200:
@@ -70,132 +163,191 @@ class WhatsAppService:
             current_app.logger.error(f"WhatsApp service error: {str(e)}")
             return False
     
-    def send_booking_confirmation(self, client_name, client_phone, service_name, appointment_date, appointment_time, duration):
+    def queue_message(self, to_phone, message_text, idempotency_key=None, template_name=None, template_params=None):
+        """Queue a message in the outbox; delivered by background workers after the caller commits"""
+        from app.utils.outbox import enqueue
+        
+        enqueue(to_phone, message_text, idempotency_key, template_name, template_params)
+        return True
+    
+    def send_bulk(self, recipients, template, params=None):
+        """Send a template message to many recipients concurrently.
+        
+        recipients: dicts with 'phone' (and any fields used in params, e.g. 'name')
+        params: body parameters; a value written as '{field}' is replaced with
+                that recipient's field (e.g. '{name}'), others are sent as-is
+        
+        Returns one result dict per recipient, in input order.
+        """
+        config = current_app.config
+        return asyncio.run(self._send_bulk(
+            list(recipients),
+            template,
+            params or [],
+            concurrency=config.get('WHATSAPP_BULK_CONCURRENCY', 20),
+            rate=config.get('WHATSAPP_MESSAGES_PER_SECOND', 80),
+            max_retries=config.get('WHATSAPP_BULK_MAX_RETRIES', 3),
+            timeout=self._timeout()
+        ))
+    
+    @staticmethod
+    def _resolve_param(value, recipient):
+        if isinstance(value, str) and len(value) > 2 and value[0] == '{' and value[-1] == '}':
+            return recipient[value[1:-1]]
+        return value
+    
+    async def _send_bulk(self, recipients, template, params, concurrency, rate, max_retries, timeout):
+        bucket = AsyncTokenBucket(rate)
+        semaphore = asyncio.Semaphore(concurrency)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json'
+        }
+        url = f"{self.api_url}/{self.phone_number_id}/messages"
+        
+        async with httpx.AsyncClient(
+            headers=headers,
+            limits=limits,
+            timeout=httpx.Timeout(timeout[1], connect=timeout[0]),
+            event_hooks={'request': [self._count_request]}
+        ) as client:
+            
+            async def send_one(recipient):
+                phone = recipient.get('phone') or ''
+                result = {'phone': phone, 'success': False, 'message_id': None, 'error': None}
+                
+                try:
+                    clean_phone = self.clean_phone(phone)
+                    template_params = [
+                        {"type": "text", "text": str(self._resolve_param(value, recipient))}
+                        for value in params
+                    ]
+                    payload = self.build_payload(clean_phone, None, template, template_params)
+                except KeyError as e:
+                    result['error'] = f'Missing recipient field: {str(e)}'
+                    return result
+                
+                async with semaphore:
+                    for attempt in range(max_retries + 1):
+                        await bucket.acquire()
+                        try:
+                            response = await client.post(url, json=payload)
+                        except httpx.HTTPError as e:
+                            result['error'] = str(e)
+                            break
+                        
+                        # Back off when throttled or the API is briefly unavailable
+                        if response.status_code in (429, 503) and attempt < max_retries:
+                            retry_after = response.headers.get('Retry-After', '')
+                            await asyncio.sleep(float(retry_after) if retry_after.isdigit() else 2 ** attempt)
+                            continue
+                        
+                        if response.status_code == 200:
+                            result['success'] = True
+                            result['error'] = None
+                            messages = response.json().get('messages') or [{}]
+                            result['message_id'] = messages[0].get('id')
+                        else:
+                            result['error'] = response.text
+                        break
+                
+                return result
+            
+            return await asyncio.gather(*(send_one(recipient) for recipient in recipients))
+    
+    def send_template(self, to_phone, template_key, idempotency_key=None, **values):
+        """Send a registered notification template.
+        
+        With WHATSAPP_USE_TEMPLATES the approved Business template is sent with
+        its parameters; otherwise the compiled body is rendered as text. The
+        message is queued via the outbox under idempotency_key, which is
+        required; use send_message() for a deliberate inline send.
+        """
+        if not idempotency_key:
+            raise ValueError(f'{template_key} notifications need an idempotency_key')
+        
+        template = message_templates[template_key]
+        
+        if current_app.config.get('WHATSAPP_USE_TEMPLATES', True):
+            message_text, template_name, template_params = None, template.name, template.params(values)
+        else:
+            message_text, template_name, template_params = template.render(values), None, None
+        
+        return self.queue_message(to_phone, message_text, idempotency_key, template_name, template_params)
+    
+    def send_booking_confirmation(self, client_name, client_phone, service_name, appointment_date, appointment_time, duration, idempotency_key=None):
         """Send booking confirmation to client"""
-        message = f"""🌟 *Beauty Palace Booking Confirmed!* 🌟
-
-Hello {client_name}! ✨
-
-Your appointment has been successfully booked:
-
-📅 *Date:* {appointment_date.strftime('%A, %B %d, %Y')}
-⏰ *Time:* {appointment_time.strftime('%I:%M %p')}
-💄 *Service:* {service_name}
-⏱️ *Duration:* {duration} minutes
-
-📍 *Location:* Beauty Palace Saswad, Pune
-
-*Important Notes:*
-• Please arrive 10 minutes early
-• Bring a valid ID for verification
-• Cancellations must be made 24 hours in advance
-• You'll receive a reminder 1 hour before your appointment
-
-We're excited to pamper you! 💅✨
-
-For any queries, reply to this message or call us.
-
-*Beauty Palace Team* 💕"""
-
-        return self.send_message(client_phone, message)
+        return self.send_template(
+            client_phone, 'booking_confirmation', idempotency_key,
+            client_name=client_name,
+            date=format_date(appointment_date),
+            time=format_time(appointment_time),
+            service_name=service_name,
+            duration=duration
+        )
     
-    def send_owner_notification(self, client_name, client_phone, service_name, appointment_date, appointment_time, duration):
+    def send_owner_notification(self, client_name, client_phone, service_name, appointment_date, appointment_time, duration, idempotency_key=None):
         """Send new booking notification to owner"""
-        message = f"""🔔 *NEW BOOKING ALERT!* 🔔
-
-*Client Details:*
-👤 Name: {client_name}
-📞 Phone: {client_phone}
-
-*Appointment Details:*
-💄 Service: {service_name}
-📅 Date: {appointment_date.strftime('%A, %B %d, %Y')}
-⏰ Time: {appointment_time.strftime('%I:%M %p')}
-⏱️ Duration: {duration} minutes
-
-*Action Required:*
-✅ Confirm appointment availability
-📋 Prepare service materials
-📞 Contact client if needed
-
-*Beauty Palace Admin Panel* 💼"""
-
-        return self.send_message(self.owner_phone, message)
+        return self.send_template(
+            self.owner_phone, 'owner_notification', idempotency_key,
+            client_name=client_name,
+            client_phone=client_phone,
+            service_name=service_name,
+            date=format_date(appointment_date),
+            time=format_time(appointment_time),
+            duration=duration
+        )
     
-    def send_appointment_reminder(self, client_name, client_phone, service_name, appointment_date, appointment_time):
-        """Send 1-hour reminder to client"""
-        message = f"""⏰ *Appointment Reminder* ⏰
-
-Hello {client_name}! 
-
-This is a friendly reminder that your appointment at *Beauty Palace* is in 1 hour:
-
-💄 *Service:* {service_name}
-📅 *Date:* {appointment_date.strftime('%A, %B %d, %Y')}
-⏰ *Time:* {appointment_time.strftime('%I:%M %p')}
-
-📍 *Address:* Beauty Palace Saswad, Pune
-
-*Please:*
-• Arrive 10 minutes early
-• Bring a valid ID
-• Wear comfortable clothing
-
-Looking forward to seeing you! ✨
-
-*Beauty Palace Team* 💕"""
-
-        return self.send_message(client_phone, message)
+    def send_appointment_reminder(self, client_name, client_phone, service_name, appointment_date, appointment_time, idempotency_key=None, lead_minutes=60):
+        """Send reminder to client lead_minutes before the appointment"""
+        return self.send_template(
+            client_phone, 'appointment_reminder', idempotency_key,
+            client_name=client_name,
+            lead=format_lead(lead_minutes),
+            service_name=service_name,
+            date=format_date(appointment_date),
+            time=format_time(appointment_time)
+        )
     
-    def send_review_thank_you(self, client_name, client_phone, rating):
+    def send_review_thank_you(self, client_name, client_phone, rating, idempotency_key=None):
         """Send thank you message after review submission"""
-        message = f"""💕 *Thank You for Your Review!* 💕
-
-Dear {client_name},
-
-Thank you so much for taking the time to share your experience with us! ⭐ Your {rating}-star review means the world to our team.
-
-Your feedback helps us:
-✨ Improve our services
-💪 Motivate our team
-🌟 Help other clients choose us
-
-We're thrilled that you loved your experience at Beauty Palace! 
-
-*Special Offer:* Get 10% off your next appointment as a thank you for your review! 🎁
-
-Book your next appointment:
-📞 Call us or WhatsApp
-💻 Visit our website
-
-*Beauty Palace Team* 💄✨"""
-
-        return self.send_message(client_phone, message)
+        return self.send_template(
+            client_phone, 'review_thank_you', idempotency_key,
+            client_name=client_name,
+            rating=rating
+        )
     
-    def send_appointment_cancellation(self, client_name, client_phone, service_name, appointment_date, appointment_time, reason=""):
+    def send_appointment_cancellation(self, client_name, client_phone, service_name, appointment_date, appointment_time, reason="", idempotency_key=None):
         """Send cancellation notification to client"""
-        message = f"""❌ *Appointment Cancelled* ❌
-
-Hello {client_name},
-
-We regret to inform you that your appointment has been cancelled:
-
-💄 *Service:* {service_name}
-📅 *Date:* {appointment_date.strftime('%A, %B %d, %Y')}
-⏰ *Time:* {appointment_time.strftime('%I:%M %p')}
-
-{f'*Reason:* {reason}' if reason else ''}
-
-*Next Steps:*
-📞 Call us to reschedule: +91-XXXXXXXXXX
-💻 Book online through our website
-📱 Reply to this message
-
-We apologize for any inconvenience and look forward to serving you soon! 
-
-*Beauty Palace Team* 💕"""
-
-        return self.send_message(client_phone, message)
+        return self.send_template(
+            client_phone, 'appointment_cancellation', idempotency_key,
+            client_name=client_name,
+            service_name=service_name,
+            date=format_date(appointment_date),
+            time=format_time(appointment_time),
+            # Template parameters cannot be empty
+            reason=reason or 'Not specified'
+        )
+    
+    def send_appointment_rescheduled(self, client_name, client_phone, service_name, old_date, old_time, new_date, new_time, idempotency_key=None):
+        """Send reschedule notification to client"""
+        return self.send_template(
+            client_phone, 'appointment_rescheduled', idempotency_key,
+            client_name=client_name,
+            old_date=format_date(old_date),
+            old_time=format_time(old_time),
+            new_date=format_date(new_date),
+            new_time=format_time(new_time),
+            service_name=service_name
+        )
+    
+    def send_review_approved(self, client_name, client_phone, idempotency_key=None):
+        """Send notification that a review is live"""
+        return self.send_template(
+            client_phone, 'review_approved', idempotency_key,
+            client_name=client_name
+        )
 
 # Initialize WhatsApp service
 whatsapp_service = WhatsAppService()
@@ -0,0 +1,92 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select
+from app import db
+import atexit
+import threading
+
+
+class WorkerPool(ABC):
+    """Background threads that drain a database-backed queue.
+
+    Subclasses implement process_batch(), returning how many rows they
+    handled; idle workers sleep until notify() or the poll interval. Rows in
+    one of `finished_statuses` are deleted by prune() once their
+    `age_column` is older than the `retention_setting` days.
+    """
+
+    name = 'worker'
+    workers_setting = None
+    poll_interval_setting = None
+
+    model = None
+    finished_statuses = ()
+    age_column = None
+    retention_setting = None
+
+    def __init__(self):
+        self.threads = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+
+    def start(self, app):
+        if self.threads:
+            return
+
+        for i in range(app.config.get(self.workers_setting, 2)):
+            thread = threading.Thread(
+                target=self._run,
+                args=(app,),
+                name=f'{self.name}-{i}',
+                daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def notify(self):
+        """Wake idle workers after new rows were committed"""
+        self._wakeup.set()
+
+    def _run(self, app):
+        with app.app_context():
+            while not self._stop.is_set():
+                try:
+                    processed = self.process_batch()
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"{self.name} error: {str(e)}")
+                    processed = 0
+                finally:
+                    db.session.remove()
+
+                if not processed:
+                    self._wakeup.wait(app.config.get(self.poll_interval_setting, 1.0))
+                    self._wakeup.clear()
+
+    @abstractmethod
+    def process_batch(self):
+        """Claim and handle one batch of due rows; returns how many were handled"""
+
+    def prune(self):
+        """Delete finished rows past the retention period, one batch per commit; returns how many"""
+        config = current_app.config
+        cutoff = datetime.utcnow() - timedelta(days=config.get(self.retention_setting, 30))
+        expired = select(self.model.id).where(
+            self.model.status.in_(self.finished_statuses),
+            getattr(self.model, self.age_column) < cutoff
+        ).limit(config.get('QUEUE_PRUNE_BATCH_SIZE', 1000))
+
+        total = 0
+        while True:
+            deleted = self.model.query.filter(self.model.id.in_(expired)).delete(synchronize_session=False)
+            db.session.commit()
+            total += deleted
+            if not deleted:
+                return total
@@ -21,6 +21,26 @@ def create_app(config_name=None):
     # Initialize Supabase
     init_supabase(app)
     
+    # Per-route latency and outbound call metrics at /metrics
+    from app.utils.metrics import metrics
+    metrics.init_app(app)
+    
+    # Size the admin role and verified token caches
+    from app.utils.auth_helpers import role_cache, token_cache
+    role_cache.configure(
+        maxsize=app.config['ROLE_CACHE_MAX_SIZE'],
+        ttl=app.config['ROLE_CACHE_TTL_SECONDS']
+    )
+    token_cache.configure(maxsize=app.config['TOKEN_CACHE_MAX_SIZE'])
+    
+    # Background sender for WhatsApp offer campaigns
+    from app.utils.campaigns import campaign_queue
+    campaign_queue.init_app(app)
+    
+    # Public catalog response cache
+    from app.utils.response_cache import catalog_cache
+    catalog_cache.configure(app)
+    
     # Register blueprints
     from app.routes.auth import auth_bp
     from app.routes.appointments import appointments_bp
@@ -9,20 +9,148 @@ class Config:
     SUPABASE_KEY = os.environ.get('SUPABASE_ANON_KEY')
     SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
     
+    # Shared HTTP pool for per-user (RLS) PostgREST clients
+    SUPABASE_POOL_MAX_CONNECTIONS = int(os.environ.get('SUPABASE_POOL_MAX_CONNECTIONS', 20))
+    SUPABASE_POOL_MAX_KEEPALIVE = 10
+    SUPABASE_POOL_KEEPALIVE_SECONDS = 30
+    SUPABASE_HTTP_TIMEOUT = 10
+    SUPABASE_CONNECT_RETRIES = 1
+    SUPABASE_HTTP2 = os.environ.get('SUPABASE_HTTP2', 'true').lower() == 'true'  # requires h2
+    
     # JWT Configuration for Supabase
     JWT_SECRET_KEY = os.environ.get('SUPABASE_JWT_SECRET')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_ALGORITHM = 'HS256'
     
+    # Admin role lookups are cached per process; a demoted admin keeps access for at most this long
+    ROLE_CACHE_TTL_SECONDS = int(os.environ.get('ROLE_CACHE_TTL_SECONDS', 60))
+    ROLE_CACHE_MAX_SIZE = 1024
+    
+    # Password hashing (bcrypt on a process pool; over the queue limit requests get 503)
+    PASSWORD_HASH_ROUNDS = int(os.environ.get('PASSWORD_HASH_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_QUEUE = 32
+    PASSWORD_HASH_TIMEOUT_SECONDS = 10
+    
+    # Verified JWT claims are cached per process until the token expires
+    TOKEN_CACHE_MAX_SIZE = 4096
+    
     # File Upload (using Supabase Storage)
     SUPABASE_STORAGE_BUCKET = 'beauty-palace-uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
     
+    # Local uploads (review images): streamed to disk, renditions built by a process pool
+    UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
+    UPLOAD_CHUNK_SIZE = 64 * 1024
+    IMAGE_MAX_PIXELS = 40_000_000
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+    UPLOAD_GC_GRACE_SECONDS = 300
+    
+    # Upload delivery: 'sendfile' (app server), 'x-sendfile' (Apache/lighttpd) or
+    # 'x-accel' (nginx: `location /protected-uploads/ { internal; alias <UPLOAD_FOLDER>/; }`)
+    UPLOAD_DELIVERY = os.environ.get('UPLOAD_DELIVERY', 'sendfile')
+    USE_X_SENDFILE = UPLOAD_DELIVERY == 'x-sendfile'
+    UPLOAD_ACCEL_PREFIX = os.environ.get('UPLOAD_ACCEL_PREFIX', '/protected-uploads/')
+    UPLOAD_SERVED_FOLDERS = ('reviews',)
+    
+    # Public catalog response cache (set CACHE_REDIS_URL to share it between workers)
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    RESPONSE_CACHE_MAX_SIZE = 256
+    RESPONSE_CACHE_LOCAL_TTL_SECONDS = int(os.environ.get('RESPONSE_CACHE_LOCAL_TTL_SECONDS', 60))
+    RESPONSE_CACHE_SHARED_TTL_SECONDS = 600
+    RESPONSE_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+    
     # WhatsApp
     WHATSAPP_PHONE_NUMBER_ID = os.environ.get('WHATSAPP_PHONE_NUMBER_ID')
     WHATSAPP_ACCESS_TOKEN = os.environ.get('WHATSAPP_ACCESS_TOKEN')
     OWNER_WHATSAPP_NUMBER = os.environ.get('OWNER_WHATSAPP_NUMBER', '919876543210')
+    
+    # Send notifications as approved WhatsApp Business templates (false: render as text)
+    WHATSAPP_USE_TEMPLATES = os.environ.get('WHATSAPP_USE_TEMPLATES', 'true').lower() == 'true'
+    
+    # WhatsApp Graph API connection pool (keep-alive session shared by all senders)
+    WHATSAPP_POOL_CONNECTIONS = 2  # number of per-host pools to cache
+    WHATSAPP_POOL_MAXSIZE = int(os.environ.get('WHATSAPP_POOL_MAXSIZE', 10))  # connections per host
+    WHATSAPP_POOL_BLOCK = True
+    WHATSAPP_CONNECT_TIMEOUT = 5
+    WHATSAPP_READ_TIMEOUT = 30
+    WHATSAPP_CONNECT_RETRIES = 2
+    
+    # WhatsApp bulk campaigns (Cloud API default throughput is 80 messages/second per number)
+    WHATSAPP_MESSAGES_PER_SECOND = int(os.environ.get('WHATSAPP_MESSAGES_PER_SECOND', 80))
+    WHATSAPP_BULK_CONCURRENCY = 20
+    WHATSAPP_BULK_MAX_RETRIES = 3
+    WHATSAPP_OFFER_TEMPLATE = os.environ.get('WHATSAPP_OFFER_TEMPLATE', 'beauty_palace_offer')
+    # Offer campaigns are sent by background workers, one page of recipients per send_bulk
+    WHATSAPP_CAMPAIGN_WORKERS = 1  # more workers multiply the effective send rate
+    WHATSAPP_CAMPAIGN_PAGE_SIZE = 500  # below PostgREST's max-rows (1000 on Supabase)
+    
+    # WhatsApp outbox delivery (set OUTBOX_WORKERS=0 to run delivery in a separate process)
+    OUTBOX_WORKERS = int(os.environ.get('OUTBOX_WORKERS', 2))
+    OUTBOX_BATCH_SIZE = 20
+    OUTBOX_POLL_INTERVAL_SECONDS = 1.0
+    OUTBOX_MAX_ATTEMPTS = 6
+    OUTBOX_RETRY_BASE_SECONDS = 30
+    OUTBOX_RETRY_MAX_SECONDS = 3600
+    OUTBOX_VISIBILITY_TIMEOUT_SECONDS = 300
+    # Sent/failed messages are deleted after this; a pruned idempotency key can be queued again
+    OUTBOX_RETENTION_DAYS = int(os.environ.get('OUTBOX_RETENTION_DAYS', 30))
+    
+    # Inbound webhook processing (payloads are queued, then routed by these workers)
+    INBOUND_WORKERS = int(os.environ.get('INBOUND_WORKERS', 2))
+    INBOUND_BATCH_SIZE = 50
+    INBOUND_POLL_INTERVAL_SECONDS = 1.0
+    INBOUND_MAX_ATTEMPTS = 5
+    INBOUND_RETRY_BASE_SECONDS = 10
+    INBOUND_VISIBILITY_TIMEOUT_SECONDS = 120
+    INBOUND_RETENTION_DAYS = int(os.environ.get('INBOUND_RETENTION_DAYS', 7))
+    
+    # The scheduler leader prunes both queues this often, deleting this many rows per commit
+    QUEUE_PRUNE_INTERVAL_SECONDS = 3600
+    QUEUE_PRUNE_BATCH_SIZE = 1000
+    
+    # Reminder scheduler (jobs persist in the database; one leader process fires them)
+    SCHEDULER_TIMEZONE = os.environ.get('SCHEDULER_TIMEZONE', 'Asia/Kolkata')
+    SCHEDULER_JOBSTORE_TABLE = 'apscheduler_jobs'
+    SCHEDULER_MISFIRE_GRACE_SECONDS = 1800
+    SCHEDULER_WAKEUP_SECONDS = 30
+    SCHEDULER_LEADER_RETRY_SECONDS = 30
+    # 'sweeper' batches due reminders every REMINDER_SWEEP_SECONDS; 'jobs' keeps one job per appointment
+    REMINDER_MODE = os.environ.get('REMINDER_MODE', 'sweeper')
+    REMINDER_LEADS_MINUTES = [1440, 60]
+    REMINDER_SWEEP_SECONDS = 60
+    
+    # Booking (weekday -> opening hours, Monday is 0)
+    BUSINESS_HOURS = {
+        0: ('09:00', '19:00'),
+        1: ('09:00', '19:00'),
+        2: ('09:00', '19:00'),
+        3: ('09:00', '19:00'),
+        4: ('09:00', '19:00'),
+        5: ('09:00', '18:00'),
+        6: ('10:00', '16:00'),
+    }
+    SLOT_INTERVAL_MINUTES = int(os.environ.get('SLOT_INTERVAL_MINUTES', 30))
+    SLOT_INDEX_TTL_SECONDS = int(os.environ.get('SLOT_INDEX_TTL_SECONDS', 30))
+    CALENDAR_MAX_DAYS = 62  # widest range /api/appointments/calendar serves
+    
+    # Approved reviews feed is kept in memory and fully reloaded this often
+    REVIEW_FEED_TTL_SECONDS = int(os.environ.get('REVIEW_FEED_TTL_SECONDS', 300))
+    
+    # Prometheus metrics at /metrics; with METRICS_DIR set, every worker writes its
+    # totals there (empty it on deploy) and any worker's /metrics reports them all
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_SECONDS = 10
+    METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    
+    # Admin analytics (admins only; each from/to report is cached, so it can lag new bookings by the TTL)
+    ANALYTICS_CHAIRS = int(os.environ.get('ANALYTICS_CHAIRS', 1))  # stations used as occupancy capacity
+    ANALYTICS_BATCH_SIZE = 5000  # rows per server-side cursor fetch
+    ANALYTICS_CACHE_TTL_SECONDS = int(os.environ.get('ANALYTICS_CACHE_TTL_SECONDS', 900))
+    ANALYTICS_DEFAULT_DAYS = 90
+    ANALYTICS_MAX_DAYS = 730
 
 class DevelopmentConfig(Config):
     DEBUG = True
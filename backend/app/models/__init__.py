@@ -3,5 +3,7 @@ from .service import Service
 from .appointment import Appointment
 from .review import Review, ReviewImage
 from .offer import Offer
+from .outbox import WhatsAppOutbox
+from .inbound import WhatsAppInbound
 
-__all__ = ['User', 'Service', 'Appointment', 'Review', 'ReviewImage', 'Offer']
+__all__ = ['User', 'Service', 'Appointment', 'Review', 'ReviewImage', 'Offer', 'WhatsAppOutbox', 'WhatsAppInbound']
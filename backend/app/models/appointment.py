@@ -1,4 +1,5 @@
 from app import db
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 
 class Appointment(db.Model):
@@ -11,8 +12,14 @@ class Appointment(db.Model):
     appointment_time = db.Column(db.Time, nullable=False)
     status = db.Column(db.String(20), default='upcoming')  # upcoming, completed, cancelled
     notes = db.Column(db.Text, nullable=True)
+    last_reminder_lead = db.Column(db.Integer, nullable=True)  # smallest reminder lead (minutes) already sent
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    @classmethod
+    def query_with_details(cls):
+        """Query that joins user and service so to_dict() issues no extra queries"""
+        return cls.query.options(joinedload(cls.user), joinedload(cls.service))
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -0,0 +1,20 @@
+from app import db
+from datetime import datetime
+
+class WhatsAppInbound(db.Model):
+    """Raw webhook payloads, stored before processing so the webhook can ack at once"""
+    __tablename__ = 'whatsapp_inbound'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, processing, processed, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('idx_whatsapp_inbound_due', 'status', 'next_attempt_at'),
+    )
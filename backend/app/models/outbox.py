@@ -0,0 +1,42 @@
+from app import db
+from datetime import datetime
+import json
+
+class WhatsAppOutbox(db.Model):
+    __tablename__ = 'whatsapp_outbox'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    idempotency_key = db.Column(db.String(200), unique=True, nullable=False)
+    to_phone = db.Column(db.String(20), nullable=False)
+    message_text = db.Column(db.Text, nullable=True)
+    template_name = db.Column(db.String(100), nullable=True)
+    template_params = db.Column(db.Text, nullable=True)  # JSON-encoded list
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('idx_whatsapp_outbox_due', 'status', 'next_attempt_at'),
+    )
+    
+    @property
+    def params(self):
+        return json.loads(self.template_params) if self.template_params else None
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'idempotency_key': self.idempotency_key,
+            'to_phone': self.to_phone,
+            'template_name': self.template_name,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
@@ -1,5 +1,8 @@
 from app import db
+from sqlalchemy.orm import joinedload, selectinload
+from app.utils.file_upload import RENDITIONS, rendition_filename
 from datetime import datetime
+import posixpath
 
 class Review(db.Model):
     __tablename__ = 'reviews'
@@ -15,6 +18,11 @@ class Review(db.Model):
     # Relationships
     images = db.relationship('ReviewImage', backref='review', lazy=True, cascade='all, delete-orphan')
     
+    @classmethod
+    def query_with_details(cls):
+        """Query that loads user and images up front (two extra queries total, not per row)"""
+        return cls.query.options(joinedload(cls.user), selectinload(cls.images))
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -36,9 +44,15 @@ class ReviewImage(db.Model):
     image_path = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    def renditions(self):
+        """URLs of the resized copies (written shortly after upload)"""
+        folder, filename = posixpath.split(self.image_path)
+        return {name: posixpath.join(folder, rendition_filename(filename, name)) for name in RENDITIONS}
+    
     def to_dict(self):
         return {
             'id': self.id,
             'image_path': self.image_path,
+            'renditions': self.renditions(),
             'created_at': self.created_at.isoformat()
         }
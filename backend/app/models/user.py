@@ -1,6 +1,6 @@
 from app import db
+from app.utils.passwords import password_hasher
 from datetime import datetime
-import bcrypt
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -11,6 +11,7 @@ class User(db.Model):
     phone = db.Column(db.String(20), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=True)
     is_admin = db.Column(db.Boolean, default=False)
+    whatsapp_opt_in = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -18,12 +19,17 @@ class User(db.Model):
     reviews = db.relationship('Review', backref='user', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
+        """Verify the password; on success, rehashes if PASSWORD_HASH_ROUNDS changed (caller commits)"""
         if not self.password_hash:
             return False
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        if not password_hasher.check(password, self.password_hash):
+            return False
+        if password_hasher.needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
     
     def to_dict(self):
         return {
@@ -32,5 +38,6 @@ class User(db.Model):
             'email': self.email,
             'phone': self.phone,
             'is_admin': self.is_admin,
+            'whatsapp_opt_in': self.whatsapp_opt_in,
             'created_at': self.created_at.isoformat()
         }
@@ -1,11 +1,28 @@
 from flask import Blueprint, request, jsonify
+from postgrest.exceptions import APIError
 from app.utils.supabase_client import get_supabase
 from app.utils.auth_helpers import token_required, admin_required
 from app.utils.whatsapp import WhatsAppService
+from app.utils.pagination import wants_stream, wants_page, keyset_page, stream_ndjson
 from datetime import datetime, date, time
 
 appointments_bp = Blueprint('appointments', __name__)
 
+# Postgres SQLSTATEs mapped to HTTP statuses (supabase/migrations/003 and 004)
+RPC_ERRORS = {
+    'P0002': 404,  # service or appointment not found
+    '42501': 403,  # not the owner or an admin
+    '23P01': 409,  # overlaps another upcoming appointment (appointments_no_overlap)
+}
+
+def rpc_error_response(error):
+    status = RPC_ERRORS.get(error.code)
+    if status is None:
+        return jsonify({'error': str(error)}), 500
+    if status == 409:
+        return jsonify({'error': 'Time slot already booked'}), status
+    return jsonify({'error': error.message}), status
+
 @appointments_bp.route('', methods=['GET'])
 @admin_required
 def get_all_appointments(current_user_id):
@@ -13,16 +30,33 @@ def get_all_appointments(current_user_id):
         supabase = get_supabase()
         
         # Get appointments with user and service details
-        result = supabase.table('appointments').select('''
-            *,
-            profiles:user_id(name, phone),
-            services:service_id(name, duration, price)
-        ''').order('appointment_date', desc=False).order('appointment_time', desc=False).execute()
+        def build_query():
+            return supabase.table('appointments').select('''
+                *,
+                profiles:user_id(name, phone),
+                services:service_id(name, duration, price)
+            ''')
+        
+        keyset = ['appointment_date', 'appointment_time', 'id']
+        
+        if wants_stream():
+            return stream_ndjson(build_query, keyset)
+        
+        if wants_page():
+            appointments, next_cursor = keyset_page(build_query, keyset)
+            return jsonify({
+                'appointments': appointments,
+                'next_cursor': next_cursor
+            }), 200
+        
+        result = build_query().order('appointment_date', desc=False).order('appointment_time', desc=False).execute()
         
         return jsonify({
             'appointments': result.data
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -56,28 +90,19 @@ def create_appointment(current_user_id):
         if not all(field in data for field in required_fields):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        # Check if service exists
-        service_result = supabase.table('services').select('*').eq('id', data['service_id']).eq('is_active', True).execute()
-        if not service_result.data:
-            return jsonify({'error': 'Service not found'}), 404
-        
-        service = service_result.data[0]
-        
-        # Create appointment
-        result = supabase.table('appointments').insert({
-            'user_id': current_user_id,
-            'service_id': data['service_id'],
-            'appointment_date': data['appointment_date'],
-            'appointment_time': data['appointment_time'],
-            'notes': data.get('notes', '')
+        # Check the service, create the appointment and fetch the profile in one call
+        result = supabase.rpc('book_appointment', {
+            'p_user_id': current_user_id,
+            'p_service_id': data['service_id'],
+            'p_appointment_date': data['appointment_date'],
+            'p_appointment_time': data['appointment_time'],
+            'p_notes': data.get('notes', '')
         }).execute()
         
         if result.data:
-            appointment = result.data[0]
-            
-            # Get user details for WhatsApp notification
-            user_result = supabase.table('profiles').select('*').eq('id', current_user_id).execute()
-            user = user_result.data[0] if user_result.data else {}
+            appointment = result.data['appointment']
+            service = result.data['service']
+            user = result.data['profile']
             
             # Send WhatsApp notifications
             try:
@@ -112,6 +137,8 @@ def create_appointment(current_user_id):
         else:
             return jsonify({'error': 'Failed to create appointment'}), 400
             
+    except APIError as e:
+        return rpc_error_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -139,6 +166,9 @@ def update_appointment_status(current_user_id, appointment_id):
         else:
             return jsonify({'error': 'Appointment not found'}), 404
             
+    except APIError as e:
+        # Reactivating a cancelled appointment whose slot was taken meanwhile
+        return rpc_error_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -148,24 +178,11 @@ def cancel_appointment(current_user_id, appointment_id):
     try:
         supabase = get_supabase()
         
-        # Check if appointment belongs to user or user is admin
-        appointment_result = supabase.table('appointments').select('*').eq('id', appointment_id).execute()
-        
-        if not appointment_result.data:
-            return jsonify({'error': 'Appointment not found'}), 404
-        
-        appointment = appointment_result.data[0]
-        
-        # Check if user owns the appointment or is admin
-        if appointment['user_id'] != current_user_id:
-            user_result = supabase.table('profiles').select('is_admin').eq('id', current_user_id).execute()
-            if not user_result.data or not user_result.data[0]['is_admin']:
-                return jsonify({'error': 'Unauthorized'}), 403
-        
-        # Update status to cancelled
-        result = supabase.table('appointments').update({
-            'status': 'cancelled'
-        }).eq('id', appointment_id).execute()
+        # Ownership/admin check and the status update in one call
+        result = supabase.rpc('cancel_appointment', {
+            'p_appointment_id': appointment_id,
+            'p_user_id': current_user_id
+        }).execute()
         
         if result.data:
             return jsonify({
@@ -174,5 +191,7 @@ def cancel_appointment(current_user_id, appointment_id):
         else:
             return jsonify({'error': 'Failed to cancel appointment'}), 400
             
+    except APIError as e:
+        return rpc_error_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from app.utils.supabase_client import get_supabase
-from app.utils.auth_helpers import token_required
+from app.utils.auth_helpers import token_required, admin_required, role_cache, invalidate_role
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -68,6 +68,7 @@ def login():
             profile_response = supabase.table('profiles').select('*').eq('id', auth_response.user.id).execute()
             
             profile = profile_response.data[0] if profile_response.data else {}
+            role_cache.set(auth_response.user.id, bool(profile.get('is_admin', False)))
             
             return jsonify({
                 'message': 'Login successful',
@@ -97,6 +98,7 @@ def get_profile(current_user_id):
         
         if result.data:
             profile = result.data[0]
+            role_cache.set(current_user_id, bool(profile['is_admin']))
             return jsonify({
                 'user': {
                     'id': profile['id'],
@@ -116,14 +118,20 @@ def get_profile(current_user_id):
 @token_required
 def update_profile(current_user_id):
     try:
-        data = request.get_json()
+        data = request.get_json() or {}
         supabase = get_supabase()
         
+        # Only the fields sent are changed (e.g. just the WhatsApp opt-in)
+        updates = {key: data[key] for key in ('name', 'phone') if key in data}
+        if 'whatsapp_opt_in' in data:
+            updates['whatsapp_opt_in'] = bool(data['whatsapp_opt_in'])
+        
+        if not updates:
+            return jsonify({'error': 'Nothing to update (name, phone or whatsapp_opt_in)'}), 400
+        
         # Update profile
-        result = supabase.table('profiles').update({
-            'name': data.get('name'),
-            'phone': data.get('phone')
-        }).eq('id', current_user_id).execute()
+        result = supabase.table('profiles').update(updates).eq('id', current_user_id).execute()
+        invalidate_role(current_user_id)
         
         if result.data:
             return jsonify({
@@ -135,3 +143,37 @@ def update_profile(current_user_id):
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@auth_bp.route('/users/<user_id>/admin', methods=['PUT'])
+@admin_required
+def set_admin(current_user_id, user_id):
+    try:
+        data = request.get_json()
+        
+        if 'is_admin' not in data:
+            return jsonify({'error': 'is_admin is required'}), 400
+        
+        if user_id == current_user_id and not data['is_admin']:
+            return jsonify({'error': 'You cannot remove your own admin access'}), 400
+        
+        supabase = get_supabase()
+        result = supabase.table('profiles').update({
+            'is_admin': bool(data['is_admin'])
+        }).eq('id', user_id).execute()
+        invalidate_role(user_id)
+        
+        if result.data:
+            return jsonify({
+                'message': 'Admin access updated successfully',
+                'user': result.data[0]
+            }), 200
+        else:
+            return jsonify({'error': 'User not found'}), 404
+            
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@auth_bp.route('/role-cache', methods=['GET'])
+@admin_required
+def role_cache_stats(current_user_id):
+    return jsonify(role_cache.stats()), 200
@@ -1,6 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.utils.supabase_client import get_supabase
 from app.utils.auth_helpers import admin_required
+from app.utils.campaigns import campaign_queue, opt_in_pages
+from app.utils.pagination import wants_stream, wants_page, keyset_page, stream_ndjson
+from app.utils.response_cache import catalog_cache
 from datetime import date
 
 offers_bp = Blueprint('offers', __name__)
@@ -8,15 +11,15 @@ offers_bp = Blueprint('offers', __name__)
 @offers_bp.route('', methods=['GET'])
 def get_active_offers():
     try:
-        supabase = get_supabase()
-        
         today = date.today().isoformat()
         
-        result = supabase.table('offers').select('*').eq('is_active', True).gte('valid_until', today).order('created_at', desc=True).execute()
+        def build_payload():
+            supabase = get_supabase()
+            result = supabase.table('offers').select('*').eq('is_active', True).gte('valid_until', today).order('created_at', desc=True).execute()
+            return {'offers': result.data}
         
-        return jsonify({
-            'offers': result.data
-        }), 200
+        # Keyed by day: offers drop out of the list once valid_until passes
+        return catalog_cache.cached_json(f'offers:{today}', build_payload)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -27,12 +30,29 @@ def get_all_offers(current_user_id):
     try:
         supabase = get_supabase()
         
-        result = supabase.table('offers').select('*').order('created_at', desc=True).execute()
+        def build_query():
+            return supabase.table('offers').select('*')
+        
+        keyset = ['created_at', 'id']
+        
+        if wants_stream():
+            return stream_ndjson(build_query, keyset, descending=True)
+        
+        if wants_page():
+            offers, next_cursor = keyset_page(build_query, keyset, descending=True)
+            return jsonify({
+                'offers': offers,
+                'next_cursor': next_cursor
+            }), 200
+        
+        result = build_query().order('created_at', desc=True).execute()
         
         return jsonify({
             'offers': result.data
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -50,6 +70,7 @@ def create_offer(current_user_id):
             'valid_until': data.get('valid_until'),
             'terms': data.get('terms', '')
         }).execute()
+        catalog_cache.invalidate('offers')
         
         if result.data:
             return jsonify({
@@ -62,6 +83,45 @@ def create_offer(current_user_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@offers_bp.route('/<offer_id>/notify', methods=['POST'])
+@admin_required
+def notify_offer(current_user_id, offer_id):
+    """Queue an active offer for every customer who opted in to WhatsApp updates.
+    
+    Recipients are collected page by page here; the messages are sent by the
+    campaign workers, so the response (202) only reports how many were queued.
+    """
+    try:
+        supabase = get_supabase()
+        
+        offer_result = supabase.table('offers').select('*').eq('id', offer_id).eq('is_active', True).execute()
+        if not offer_result.data:
+            return jsonify({'error': 'Offer not found'}), 404
+        
+        offer = offer_result.data[0]
+        
+        pages = list(opt_in_pages(supabase, current_app.config.get('WHATSAPP_CAMPAIGN_PAGE_SIZE', 500)))
+        queued = sum(len(page) for page in pages)
+        
+        campaign_queue.enqueue(
+            pages,
+            template=current_app.config['WHATSAPP_OFFER_TEMPLATE'],
+            params=[
+                '{name}',
+                offer['title'],
+                f"{offer['discount_percentage']}%",
+                offer['valid_until']
+            ]
+        )
+        
+        return jsonify({
+            'message': f'Offer queued for {queued} customers',
+            'queued': queued
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @offers_bp.route('/<offer_id>', methods=['PUT'])
 @admin_required
 def update_offer(current_user_id, offer_id):
@@ -77,6 +137,7 @@ def update_offer(current_user_id, offer_id):
             'terms': data.get('terms'),
             'is_active': data.get('is_active', True)
         }).eq('id', offer_id).execute()
+        catalog_cache.invalidate('offers')
         
         if result.data:
             return jsonify({
@@ -98,6 +159,7 @@ def delete_offer(current_user_id, offer_id):
         result = supabase.table('offers').update({
             'is_active': False
         }).eq('id', offer_id).execute()
+        catalog_cache.invalidate('offers')
         
         if result.data:
             return jsonify({
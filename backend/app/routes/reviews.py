@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from app.utils.supabase_client import get_supabase
 from app.utils.auth_helpers import token_required, admin_required
 from app.utils.whatsapp import WhatsAppService
+from app.utils.pagination import wants_stream, wants_page, keyset_page, stream_ndjson
 
 reviews_bp = Blueprint('reviews', __name__)
 
@@ -29,16 +30,33 @@ def get_all_reviews(current_user_id):
     try:
         supabase = get_supabase()
         
-        result = supabase.table('reviews').select('''
-            *,
-            profiles:user_id(name, phone),
-            review_images(*)
-        ''').order('created_at', desc=True).execute()
+        def build_query():
+            return supabase.table('reviews').select('''
+                *,
+                profiles:user_id(name, phone),
+                review_images(*)
+            ''')
+        
+        keyset = ['created_at', 'id']
+        
+        if wants_stream():
+            return stream_ndjson(build_query, keyset, descending=True)
+        
+        if wants_page():
+            reviews, next_cursor = keyset_page(build_query, keyset, descending=True)
+            return jsonify({
+                'reviews': reviews,
+                'next_cursor': next_cursor
+            }), 200
+        
+        result = build_query().order('created_at', desc=True).execute()
         
         return jsonify({
             'reviews': result.data
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1,19 +1,19 @@
 from flask import Blueprint, request, jsonify
 from app.utils.supabase_client import get_supabase
 from app.utils.auth_helpers import admin_required
+from app.utils.response_cache import catalog_cache
 
 services_bp = Blueprint('services', __name__)
 
 @services_bp.route('', methods=['GET'])
 def get_services():
     try:
-        supabase = get_supabase()
-        
-        result = supabase.table('services').select('*').eq('is_active', True).order('created_at').execute()
+        def build_payload():
+            supabase = get_supabase()
+            result = supabase.table('services').select('*').eq('is_active', True).order('created_at').execute()
+            return {'services': result.data}
         
-        return jsonify({
-            'services': result.data
-        }), 200
+        return catalog_cache.cached_json('services', build_payload)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -49,6 +49,7 @@ def create_service(current_user_id):
             'duration': data.get('duration'),
             'image_url': data.get('image_url')
         }).execute()
+        catalog_cache.invalidate('services')
         
         if result.data:
             return jsonify({
@@ -76,6 +77,7 @@ def update_service(current_user_id, service_id):
             'image_url': data.get('image_url'),
             'is_active': data.get('is_active', True)
         }).eq('id', service_id).execute()
+        catalog_cache.invalidate('services')
         
         if result.data:
             return jsonify({
@@ -98,6 +100,7 @@ def delete_service(current_user_id, service_id):
         result = supabase.table('services').update({
             'is_active': False
         }).eq('id', service_id).execute()
+        catalog_cache.invalidate('services')
         
         if result.data:
             return jsonify({
@@ -1,72 +1,93 @@
 from functools import wraps
-from flask import request, jsonify, current_app
+from flask import request, jsonify, current_app, g
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
 from app.utils.supabase_client import get_supabase
+from app.utils.cache import TTLCache
+import hashlib
 import jwt
+import time
 
-def token_required(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
-        
-        try:
-            # Remove 'Bearer ' prefix
-            if token.startswith('Bearer '):
-                token = token[7:]
-            
-            # Verify Supabase JWT token
-            payload = jwt.decode(
-                token, 
-                current_app.config['JWT_SECRET_KEY'], 
-                algorithms=[current_app.config['JWT_ALGORITHM']]
-            )
-            
-            current_user_id = payload['sub']
-            
-        except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token has expired'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'error': 'Token is invalid'}), 401
-        
-        return f(current_user_id, *args, **kwargs)
+# Verified claims by SHA-256 of the token, each kept until the token's exp
+token_cache = TTLCache(maxsize=4096, ttl=300)
+
+# profiles.is_admin by user id (sized and timed by ROLE_CACHE_* in create_app)
+role_cache = TTLCache(maxsize=1024, ttl=60)
+
+def is_admin(user_id):
+    """Whether the user is an admin, from the role cache or the profiles table"""
+    cached = role_cache.get(user_id)
+    if cached is not None:
+        return cached
+    
+    supabase = get_supabase()
+    result = supabase.table('profiles').select('is_admin').eq('id', user_id).execute()
     
-    return decorated
+    admin = bool(result.data and result.data[0]['is_admin'])
+    role_cache.set(user_id, admin)
+    return admin
 
-def admin_required(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
-        
-        try:
+def invalidate_role(user_id):
+    """Forget the cached role after a profile change"""
+    role_cache.pop(user_id)
+
+def verify_token(token):
+    """Claims of a valid token; jwt.decode runs once per token, later calls hit the cache"""
+    digest = hashlib.sha256(token.encode()).digest()
+    
+    claims = token_cache.get(digest)
+    if claims is not None:
+        return claims
+    
+    # Verify Supabase JWT token
+    claims = jwt.decode(
+        token, 
+        current_app.config['JWT_SECRET_KEY'], 
+        algorithms=[current_app.config['JWT_ALGORITHM']]
+    )
+    
+    if 'exp' in claims:
+        token_cache.set(digest, claims, ttl=claims['exp'] - time.time())
+    else:
+        token_cache.set(digest, claims)
+    return claims
+
+def _auth_decorator(require_admin):
+    """Shared core of token_required and admin_required.
+    
+    Sets g.current_user to the verified claims and passes the user id
+    ('sub') as the first argument of the view.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            token = request.headers.get('Authorization')
+            
+            if not token:
+                return jsonify({'error': 'Token is missing'}), 401
+            
+            # Remove 'Bearer ' prefix
             if token.startswith('Bearer '):
                 token = token[7:]
             
-            payload = jwt.decode(
-                token, 
-                current_app.config['JWT_SECRET_KEY'], 
-                algorithms=[current_app.config['JWT_ALGORITHM']]
-            )
+            try:
+                claims = verify_token(token)
+                current_user_id = claims['sub']
+            except jwt.ExpiredSignatureError:
+                return jsonify({'error': 'Token has expired'}), 401
+            except (jwt.InvalidTokenError, KeyError):
+                return jsonify({'error': 'Token is invalid'}), 401
             
-            current_user_id = payload['sub']
+            g.current_user = claims
             
             # Check if user is admin
-            supabase = get_supabase()
-            result = supabase.table('profiles').select('is_admin').eq('id', current_user_id).execute()
-            
-            if not result.data or not result.data[0]['is_admin']:
+            if require_admin and not is_admin(current_user_id):
                 return jsonify({'error': 'Admin access required'}), 403
             
-        except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token has expired'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'error': 'Token is invalid'}), 401
+            return f(current_user_id, *args, **kwargs)
         
-        return f(current_user_id, *args, **kwargs)
+        return decorated
     
-    return decorated
+    return decorator
+
+token_required = _auth_decorator(require_admin=False)
+admin_required = _auth_decorator(require_admin=True)
@@ -0,0 +1,84 @@
+"""Per-request overhead of token_required before and after the verified-token cache.
+
+The admin dashboard sends the same bearer token with every call, so after
+the first request the cached decorator only hashes the token and does an
+LRU lookup instead of an HMAC verification and claims validation.
+
+    python -m app.utils.bench_auth [requests]
+"""
+from functools import wraps
+from flask import Flask, request, jsonify, current_app
+import jwt
+import sys
+import time
+from app.utils.auth_helpers import token_required, token_cache
+
+
+def uncached_token_required(f):
+    """token_required as it was: decode and verify on every request"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = request.headers.get('Authorization')
+
+        if not token:
+            return jsonify({'error': 'Token is missing'}), 401
+
+        try:
+            if token.startswith('Bearer '):
+                token = token[7:]
+
+            payload = jwt.decode(
+                token,
+                current_app.config['JWT_SECRET_KEY'],
+                algorithms=[current_app.config['JWT_ALGORITHM']]
+            )
+
+            current_user_id = payload['sub']
+
+        except jwt.ExpiredSignatureError:
+            return jsonify({'error': 'Token has expired'}), 401
+        except jwt.InvalidTokenError:
+            return jsonify({'error': 'Token is invalid'}), 401
+
+        return f(current_user_id, *args, **kwargs)
+
+    return decorated
+
+
+def view(current_user_id):
+    return current_user_id
+
+
+def run(label, decorated, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        decorated()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} {elapsed / requests * 1e6:8.2f} us/request")
+
+
+def bench(requests=20000):
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'bench-secret-with-at-least-32-bytes!'
+    app.config['JWT_ALGORITHM'] = 'HS256'
+
+    token = jwt.encode(
+        {
+            'sub': '8f14e45f-ceea-467f-a9e5-9b4c6c8a1d2e',
+            'email': 'admin@beautypalace.in',
+            'role': 'authenticated',
+            'exp': int(time.time()) + 3600
+        },
+        app.config['JWT_SECRET_KEY'],
+        algorithm='HS256'
+    )
+
+    with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+        run('jwt.decode per call', uncached_token_required(view), requests)
+        token_cache.clear()
+        run('verified-token cache', token_required(view), requests)
+        print(f"cache: {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
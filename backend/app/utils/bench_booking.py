@@ -0,0 +1,92 @@
+"""Latency of booking and cancelling: sequential PostgREST calls vs the RPC functions.
+
+Needs a Supabase project with migration 003 applied and SUPABASE_URL /
+SUPABASE_SERVICE_ROLE_KEY in the environment. Books and cancels real rows
+for the given user and service, then deletes them.
+
+    python -m app.utils.bench_booking <user_id> <service_id> [iterations]
+"""
+from datetime import date, timedelta
+import os
+import statistics
+import sys
+import time
+from supabase import create_client
+
+
+def legacy_book(supabase, user_id, service_id, day, slot):
+    service = supabase.table('services').select('*').eq('id', service_id).eq('is_active', True).execute().data[0]
+    appointment = supabase.table('appointments').insert({
+        'user_id': user_id,
+        'service_id': service_id,
+        'appointment_date': day,
+        'appointment_time': slot,
+        'notes': ''
+    }).execute().data[0]
+    profile = supabase.table('profiles').select('*').eq('id', user_id).execute().data[0]
+    return appointment, service, profile
+
+
+def legacy_cancel(supabase, user_id, appointment_id):
+    appointment = supabase.table('appointments').select('*').eq('id', appointment_id).execute().data[0]
+    if appointment['user_id'] != user_id:
+        supabase.table('profiles').select('is_admin').eq('id', user_id).execute()
+    supabase.table('appointments').update({'status': 'cancelled'}).eq('id', appointment_id).execute()
+
+
+def rpc_book(supabase, user_id, service_id, day, slot):
+    booking = supabase.rpc('book_appointment', {
+        'p_user_id': user_id,
+        'p_service_id': service_id,
+        'p_appointment_date': day,
+        'p_appointment_time': slot
+    }).execute().data
+    return booking['appointment'], booking['service'], booking['profile']
+
+
+def rpc_cancel(supabase, user_id, appointment_id):
+    supabase.rpc('cancel_appointment', {
+        'p_appointment_id': appointment_id,
+        'p_user_id': user_id
+    }).execute()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{label:<18} median {statistics.median(samples):7.1f} ms   p95 {p95:7.1f} ms")
+
+
+def bench(user_id, service_id, iterations=20):
+    supabase = create_client(os.environ['SUPABASE_URL'], os.environ['SUPABASE_SERVICE_ROLE_KEY'])
+    # Far-future day and distinct minutes, so no real booking is touched
+    day = (date.today() + timedelta(days=3650)).isoformat()
+    created = []
+
+    try:
+        for label, book, cancel in (('legacy', legacy_book, legacy_cancel), ('rpc', rpc_book, rpc_cancel)):
+            book_ms, cancel_ms = [], []
+            for i in range(iterations):
+                slot = f"{9 + i // 60:02d}:{i % 60:02d}"
+                (appointment, _, _), elapsed = timed(book, supabase, user_id, service_id, day, slot)
+                created.append(appointment['id'])
+                book_ms.append(elapsed)
+                _, elapsed = timed(cancel, supabase, user_id, appointment['id'])
+                cancel_ms.append(elapsed)
+            report(f"{label} book", book_ms)
+            report(f"{label} cancel", cancel_ms)
+    finally:
+        if created:
+            supabase.table('appointments').delete().in_('id', created).execute()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit(__doc__)
+    bench(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 20)
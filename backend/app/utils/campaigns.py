@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.whatsapp import WhatsAppService
+import atexit
+
+
+def opt_in_pages(supabase, page_size):
+    """Customers who opted in to WhatsApp updates, page_size at a time.
+
+    Walks profiles by id so no page is cut short by PostgREST's max-rows.
+    """
+    last_id = None
+    while True:
+        query = supabase.table('profiles').select('id, name, phone').eq(
+            'whatsapp_opt_in', True
+        ).not_.is_('phone', 'null')
+        if last_id is not None:
+            query = query.gt('id', last_id)
+
+        rows = query.order('id').limit(page_size).execute().data
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]['id']
+
+
+class CampaignQueue:
+    """Sends bulk WhatsApp campaigns off the request path.
+
+    Each queued page of recipients is one send_bulk call on a background
+    thread; with one worker (the default) pages go out in order and the
+    WHATSAPP_MESSAGES_PER_SECOND limit holds for the whole process.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._executor = None
+
+    def init_app(self, app):
+        self.app = app
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config.get('WHATSAPP_CAMPAIGN_WORKERS', 1),
+            thread_name_prefix='campaign'
+        )
+        atexit.register(self._executor.shutdown, wait=False)
+
+    def enqueue(self, pages, template, params):
+        for page in pages:
+            self._executor.submit(self._send_page, page, template, params)
+
+    def _send_page(self, recipients, template, params):
+        with self.app.app_context():
+            try:
+                results = WhatsAppService().send_bulk(recipients, template=template, params=params)
+            except Exception as e:
+                self.app.logger.error(f"Campaign {template} failed for {len(recipients)} recipients: {str(e)}")
+                return
+            sent = sum(1 for result in results if result['success'])
+            self.app.logger.info(f"Campaign {template}: sent {sent} of {len(results)}")
+
+# Initialize campaign queue
+campaign_queue = CampaignQueue()
@@ -1,36 +1,222 @@
 import os
-from werkzeug.utils import secure_filename
+import hashlib
+import multiprocessing
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
 from PIL import Image
 
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+
+# Magic bytes of the accepted formats -> Pillow format name
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+)
+
+# Rendition name -> (max width, max height, format); generated off-request
+RENDITIONS = {
+    'thumb': (240, 240, 'JPEG'),
+    '600w': (600, None, 'JPEG'),
+    '1200w': (1200, None, 'JPEG'),
+    '600w_webp': (600, None, 'WEBP'),
+    '1200w_webp': (1200, None, 'WEBP'),
+}
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+# Stored files are named by content digest, so a URL never changes meaning
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def rendition_filename(filename, rendition):
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}_{rendition}.{EXTENSIONS[RENDITIONS[rendition][2]]}"
+
+def sniff_format(header):
+    """Image format from the first bytes of the upload, or None"""
+    for signature, image_format in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    return None
+
+def stream_to_disk(stream, out, chunk_size, max_bytes):
+    """Copy an upload stream to an open file in chunks, hashing as it goes.
+
+    Returns (first chunk for sniffing, SHA-256 hex digest).
+    """
+    header = b''
+    written = 0
+    digest = hashlib.sha256()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if not header:
+            header = chunk
+        written += len(chunk)
+        if written > max_bytes:
+            raise ValueError('File is too large')
+        digest.update(chunk)
+        out.write(chunk)
+    return header, digest.hexdigest()
+
+def validate_image(path, expected_format, max_pixels):
+    """Check the image header (Pillow reads only the header until load())"""
+    with Image.open(path) as img:
+        if img.format != expected_format:
+            raise ValueError('File content does not match an allowed image type')
+        if img.width * img.height > max_pixels:
+            raise ValueError('Image dimensions are too large')
+
+def _fit(img, max_width, max_height=None):
+    """Downscale to fit the box: cheap integer reduce() first, LANCZOS for the rest"""
+    scale = max_width / img.width
+    if max_height:
+        scale = min(scale, max_height / img.height)
+    if scale >= 1:
+        return img
+
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+
+    # Box-average down to no less than twice the target, then resample properly
+    factor = min(img.width // size[0], img.height // size[1]) // 2
+    if factor >= 2:
+        img = img.reduce(factor)
+    return img.resize(size, Image.Resampling.LANCZOS)
+
+def make_renditions(source_path, out_dir, filename):
+    """Write every rendition of source_path (runs in the image process pool)"""
+    with Image.open(source_path) as img:
+        # JPEG: let the decoder downscale by 1/2, 1/4 or 1/8 while still
+        # large enough for the biggest rendition
+        largest = max(width for width, _, _ in RENDITIONS.values())
+        if img.format == 'JPEG' and img.width > largest:
+            img.draft('RGB', (largest, round(img.height * largest / img.width)))
+
+        img.load()
+        if img.mode not in ('RGB', 'RGBA'):
+            has_alpha = img.mode in ('LA', 'PA') or 'transparency' in img.info
+            img = img.convert('RGBA' if has_alpha else 'RGB')
+
+        # Largest first, so each rendition is reduced from the previous one
+        written = []
+        source = img
+        for rendition, (width, height, image_format) in sorted(RENDITIONS.items(), key=lambda r: -r[1][0]):
+            output = _fit(source, width, height)
+            if height is None:
+                source = output
+
+            if image_format == 'JPEG' and output.mode == 'RGBA':
+                flattened = Image.new('RGB', output.size, (255, 255, 255))
+                flattened.paste(output, mask=output.split()[3])
+                output = flattened
+
+            target = os.path.join(out_dir, rendition_filename(filename, rendition))
+            temp = f"{target}.tmp"
+            if image_format == 'JPEG':
+                output.save(temp, 'JPEG', quality=85, optimize=True, progressive=True)
+            else:
+                output.save(temp, 'WEBP', quality=80, method=4)
+            os.replace(temp, target)
+            written.append(target)
+    return written
+
+class ImageProcessor:
+    """Process pool that builds renditions after the request has returned"""
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # Spawned like the bcrypt pool: children import this module only
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=current_app.config.get('IMAGE_WORKERS', 2),
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._executor
+
+    def enqueue(self, source_path, out_dir, filename):
+        future = self.executor().submit(make_renditions, source_path, out_dir, filename)
+        logger = current_app.logger
+
+        def log_failure(done):
+            if done.exception():
+                logger.error(f"Rendition error for {filename}: {done.exception()}")
+
+        future.add_done_callback(log_failure)
+        return future
+
+image_processor = ImageProcessor()
+
+def renditions_missing(upload_path, filename):
+    return any(
+        not os.path.exists(os.path.join(upload_path, rendition_filename(filename, rendition)))
+        for rendition in RENDITIONS
+    )
+
 def save_uploaded_file(file, folder):
-    """Save uploaded file and return filename"""
+    """Store an uploaded image under its content digest and queue its renditions.
+
+    The upload is streamed to a temporary file while being hashed. If a file
+    with the same digest is already stored, the copy is discarded and nothing
+    is resized again. Returns the stored filename ('<sha256>.<ext>'), or None
+    if the upload was rejected.
+    """
     try:
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            # Add timestamp to avoid conflicts
-            name, ext = os.path.splitext(filename)
-            filename = f"{name}_{int(datetime.now().timestamp())}{ext}"
-            
-            upload_path = os.path.join('uploads', folder)
+            config = current_app.config
+            upload_path = os.path.join(config.get('UPLOAD_FOLDER', 'uploads'), folder)
             os.makedirs(upload_path, exist_ok=True)
-            
-            file_path = os.path.join(upload_path, filename)
-            file.save(file_path)
-            
-            # Resize image if needed
-            with Image.open(file_path) as img:
-                if img.width > 1200:
-                    ratio = 1200 / img.width
-                    new_height = int(img.height * ratio)
-                    img = img.resize((1200, new_height), Image.Resampling.LANCZOS)
-                    img.save(file_path, optimize=True, quality=85)
-            
+
+            fd, temp_path = tempfile.mkstemp(suffix='.part', dir=upload_path)
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    header, digest = stream_to_disk(
+                        file.stream,
+                        out,
+                        config.get('UPLOAD_CHUNK_SIZE', 64 * 1024),
+                        config.get('MAX_CONTENT_LENGTH') or 16 * 1024 * 1024
+                    )
+
+                image_format = sniff_format(header)
+                if image_format is None:
+                    raise ValueError('File content is not a supported image')
+
+                filename = f"{digest}.{EXTENSIONS[image_format]}"
+                file_path = os.path.join(upload_path, filename)
+
+                if os.path.exists(file_path):
+                    # Already stored; refresh mtime so cleanup treats it as in use
+                    os.utime(file_path)
+                else:
+                    validate_image(temp_path, image_format, config.get('IMAGE_MAX_PIXELS', 40_000_000))
+                    os.replace(temp_path, file_path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+            if renditions_missing(upload_path, filename):
+                image_processor.enqueue(file_path, upload_path, filename)
             return filename
     except Exception as e:
         print(f"File upload error: {str(e)}")
     return None
+
+def delete_stored_file(upload_path, filename):
+    """Remove a stored image and its renditions"""
+    for name in [filename] + [rendition_filename(filename, rendition) for rendition in RENDITIONS]:
+        try:
+            os.remove(os.path.join(upload_path, name))
+        except FileNotFoundError:
+            pass
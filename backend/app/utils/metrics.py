@@ -0,0 +1,258 @@
+from bisect import bisect_left
+from flask import Response, request
+import glob
+import json
+import os
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# name -> (type, help)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests handled, by route, method and status'),
+    'http_request_duration_seconds': ('histogram', 'Time spent in the handler, by route and method'),
+    'db_queries_total': ('counter', 'SQL statements executed, by route ("" outside requests)'),
+    'db_queries_per_request': ('histogram', 'SQL statements executed per request, by route'),
+    'outbound_requests_total': ('counter', 'HTTP calls to Supabase and WhatsApp, by service and route'),
+}
+
+
+class _Shard:
+    """Counters written by exactly one thread, so increments need no lock"""
+
+    __slots__ = ('thread', 'counters', 'histograms')
+
+    def __init__(self):
+        self.thread = threading.current_thread()
+        self.counters = {}
+        self.histograms = {}
+
+
+class Metrics:
+    """Per-request latency, SQL and outbound call metrics in Prometheus format.
+
+    Every thread records into its own shard; /metrics sums the shards, so the
+    request path never takes a lock. Shards of finished threads are folded
+    into one retired shard when scraped. With METRICS_DIR set, each process
+    also writes its totals there and /metrics adds up every process's file,
+    so a scrape of any worker reports the whole server.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = _Shard()
+        self.definitions = dict(METRICS)
+        self._sources = {}
+        self.buckets = {
+            'http_request_duration_seconds': LATENCY_BUCKETS,
+            'db_queries_per_request': QUERY_BUCKETS,
+        }
+        self.directory = None
+        self.flush_seconds = 10
+        self._flushed_at = 0
+
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        self.buckets['http_request_duration_seconds'] = tuple(
+            app.config.get('METRICS_LATENCY_BUCKETS', LATENCY_BUCKETS)
+        )
+        self.directory = app.config.get('METRICS_DIR')
+        self.flush_seconds = app.config.get('METRICS_FLUSH_SECONDS', 10)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    def register_counter(self, name, help_text, read):
+        """Export a counter kept elsewhere; read() returns its current value at scrape time"""
+        self.definitions[name] = ('counter', help_text)
+        self._sources[name] = read
+
+    def track_queries(self, engine):
+        """Count every SQL statement run on a SQLAlchemy engine"""
+        from sqlalchemy import event
+        event.listen(engine, 'before_cursor_execute', self._count_query)
+
+    # Recording (called on the request path; thread-local only)
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name, labels, amount=1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        histograms = self._shard().histograms
+        buckets = self.buckets[name]
+        key = (name, labels)
+        histogram = histograms.get(key)
+        if histogram is None:
+            # one slot per bucket, one for +Inf, then the sum
+            histogram = histograms[key] = [0] * (len(buckets) + 2)
+        histogram[bisect_left(buckets, value)] += 1
+        histogram[-1] += value
+
+    def current_route(self):
+        """Route of the request this thread is handling, '' for background work"""
+        return getattr(self._local, 'route', None) or ''
+
+    def count_outbound(self, service):
+        self.inc('outbound_requests_total', (('service', service), ('route', self.current_route())))
+
+    def _count_query(self, conn, cursor, statement, parameters, context, executemany):
+        self.inc('db_queries_total', (('route', self.current_route()),))
+        if getattr(self._local, 'route', None) is not None:
+            self._local.queries += 1
+
+    def _start_request(self):
+        local = self._local
+        local.route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        local.queries = 0
+        local.started = time.perf_counter()
+
+    def _record_request(self, status):
+        local = self._local
+        route = local.route
+        elapsed = time.perf_counter() - local.started
+        self.inc('http_requests_total', (('route', route), ('method', request.method), ('status', str(status))))
+        self.observe('http_request_duration_seconds', (('route', route), ('method', request.method)), elapsed)
+        self.observe('db_queries_per_request', (('route', route),), local.queries)
+        local.route = None
+
+        if self.directory and time.monotonic() - self._flushed_at > self.flush_seconds:
+            self._flushed_at = time.monotonic()
+            self.flush()
+
+    def _finish_request(self, response):
+        if getattr(self._local, 'route', None) is not None:
+            self._record_request(response.status_code)
+        return response
+
+    def _teardown_request(self, error=None):
+        # after_request does not run when the handler raised
+        if getattr(self._local, 'route', None) is not None:
+            self._record_request(500)
+
+    # Aggregation (called on scrape)
+
+    def snapshot(self):
+        """(counters, histograms) summed over every thread of this process"""
+        with self._lock:
+            alive = []
+            for shard in self._shards:
+                if shard.thread.is_alive():
+                    alive.append(shard)
+                else:
+                    self._merge(self._retired, shard.counters, shard.histograms)
+            self._shards = alive
+
+            total = _Shard()
+            self._merge(total, self._retired.counters, self._retired.histograms)
+            for shard in alive:
+                # dict.copy() is atomic under the GIL, so a concurrent insert is never half-seen
+                self._merge(total, shard.counters.copy(), shard.histograms.copy())
+        for name, read in self._sources.items():
+            total.counters[(name, ())] = read()
+        return total.counters, total.histograms
+
+    @staticmethod
+    def _merge(target, counters, histograms):
+        for key, value in counters.items():
+            target.counters[key] = target.counters.get(key, 0) + value
+        for key, values in histograms.items():
+            current = target.histograms.get(key)
+            if current is None:
+                target.histograms[key] = list(values)
+            else:
+                for i, value in enumerate(values):
+                    current[i] += value
+
+    def flush(self):
+        """Write this process's totals to METRICS_DIR for the other workers to aggregate"""
+        counters, histograms = self.snapshot()
+        payload = {
+            'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+            'histograms': [[name, labels, values] for (name, labels), values in histograms.items()],
+        }
+        path = os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+        partial = f'{path}.{threading.get_ident()}.tmp'
+        with open(partial, 'w') as f:
+            json.dump(payload, f)
+        os.replace(partial, path)
+
+    def collect(self):
+        """Totals for the whole server: this process, plus every worker in METRICS_DIR"""
+        if not self.directory:
+            return self.snapshot()
+
+        self.flush()
+        total = _Shard()
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            try:
+                with open(path) as f:
+                    payload = json.load(f)
+            except (OSError, ValueError):
+                continue
+            self._merge(
+                total,
+                {(name, tuple(map(tuple, labels))): value for name, labels, value in payload['counters']},
+                {(name, tuple(map(tuple, labels))): values for name, labels, values in payload['histograms']}
+            )
+        return total.counters, total.histograms
+
+    # Exposition
+
+    def render(self):
+        counters, histograms = self.collect()
+        lines = []
+        for name, (kind, help_text) in self.definitions.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{format_labels(labels)} {value}')
+            else:
+                buckets = self.buckets[name]
+                for (metric, labels), values in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets + ('+Inf',), values):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{format_labels(labels + (("le", str(bound)),))} {cumulative}')
+                    lines.append(f'{name}_sum{format_labels(labels)} {values[-1]}')
+                    lines.append(f'{name}_count{format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in labels) + '}'
+
+
+# Initialize metrics (one registry per process)
+metrics = Metrics()
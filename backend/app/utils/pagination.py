@@ -0,0 +1,90 @@
+import base64
+import json
+from flask import Response, request, stream_with_context
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+
+def encode_cursor(row, keys):
+    """Opaque cursor holding the keyset values of the last row on a page"""
+    values = [row[key] for key in keys]
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, keys):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+        return values
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def wants_stream():
+    """True when the client asked for newline-delimited JSON"""
+    return request.args.get('format') == 'ndjson'
+
+
+def wants_page():
+    return 'limit' in request.args or 'cursor' in request.args
+
+
+def page_size():
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    return max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+def _quote(value):
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def keyset_filter(keys, values, descending=False):
+    """PostgREST or= expression selecting rows strictly after the cursor.
+
+    (a, b, c) > (x, y, z) expands to a>x, (a=x and b>y), (a=x and b=y and c>z).
+    """
+    op = 'lt' if descending else 'gt'
+    clauses = []
+    for i, key in enumerate(keys):
+        parts = [f'{k}.eq.{_quote(v)}' for k, v in zip(keys[:i], values[:i])]
+        parts.append(f'{key}.{op}.{_quote(values[i])}')
+        clauses.append(parts[0] if len(parts) == 1 else f"and({','.join(parts)})")
+    return ','.join(clauses)
+
+
+def fetch_page(build_query, keys, limit, after=None, descending=False):
+    """Fetch one keyset page; build_query returns a fresh select builder"""
+    query = build_query()
+    if after:
+        query = query.or_(keyset_filter(keys, after, descending))
+    for key in keys:
+        query = query.order(key, desc=descending)
+
+    rows = query.limit(limit + 1).execute().data
+    next_cursor = encode_cursor(rows[limit - 1], keys) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def keyset_page(build_query, keys, descending=False):
+    """Return (rows, next_cursor) for the page after ?cursor="""
+    cursor = request.args.get('cursor')
+    after = decode_cursor(cursor, keys) if cursor else None
+    return fetch_page(build_query, keys, page_size(), after, descending)
+
+
+def stream_ndjson(build_query, keys, descending=False):
+    """Stream every row as NDJSON, walking the keyset in fixed-size batches"""
+    def generate():
+        after = None
+        while True:
+            rows, next_cursor = fetch_page(build_query, keys, STREAM_BATCH_SIZE, after, descending)
+            for row in rows:
+                yield json.dumps(row) + '\n'
+            if next_cursor is None:
+                break
+            after = [rows[-1][key] for key in keys]
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
@@ -0,0 +1,131 @@
+from flask import current_app, request
+from app.utils.cache import TTLCache
+import hashlib
+
+
+class ResponseCache:
+    """Read-through cache of serialized JSON responses, served with ETags.
+
+    Entries live in an in-process LRU and, when CACHE_REDIS_URL is set, in
+    Redis so that all workers share one copy. Writers call invalidate() with
+    the entry's namespace. With Redis, that bumps a shared generation number
+    that every lookup checks, so no worker serves a local copy after it; one
+    small GET per request buys that. Without Redis, other processes drop
+    their local copy after RESPONSE_CACHE_LOCAL_TTL_SECONDS.
+    """
+
+    def __init__(self, prefix='response'):
+        self.prefix = prefix
+        self.local = TTLCache(maxsize=256, ttl=60)
+        self._redis = None
+        self._redis_url = None
+
+    def configure(self, app):
+        self.local.configure(
+            maxsize=app.config.get('RESPONSE_CACHE_MAX_SIZE', 256),
+            ttl=app.config.get('RESPONSE_CACHE_LOCAL_TTL_SECONDS', 60)
+        )
+        self._redis_url = app.config.get('CACHE_REDIS_URL')
+
+    @property
+    def redis(self):
+        """Shared Redis client, or None when not configured or not installed"""
+        if self._redis is None and self._redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(self._redis_url, socket_timeout=0.5)
+            except ImportError:
+                current_app.logger.warning("CACHE_REDIS_URL is set but redis is not installed; using the local cache only")
+                self._redis_url = None
+        return self._redis
+
+    def _shared_key(self, key, generation):
+        return f"{self.prefix}:{generation}:{key}"
+
+    def _generation_key(self, namespace):
+        return f"{self.prefix}:generation:{namespace}"
+
+    def generation(self, namespace):
+        """Shared generation of a namespace, bumped by every invalidate().
+
+        None without Redis (or when it is unreachable): the local layer is
+        then the only one and is trusted until its TTL.
+        """
+        if self.redis is None:
+            return None
+        try:
+            return int(self.redis.get(self._generation_key(namespace)) or 0)
+        except Exception as e:
+            current_app.logger.warning(f"Shared cache read failed: {str(e)}")
+            return None
+
+    def get(self, key, generation=None):
+        entry = self.local.get(key)
+        # A local copy from an older generation was invalidated by another worker
+        if entry is not None and entry[2] == generation:
+            return entry[:2]
+
+        if generation is not None:
+            try:
+                body = self.redis.get(self._shared_key(key, generation))
+            except Exception as e:
+                current_app.logger.warning(f"Shared cache read failed: {str(e)}")
+                body = None
+            if body is not None:
+                entry = (body, etag_for(body), generation)
+                self.local.set(key, entry)
+                return entry[:2]
+
+        return None
+
+    def set(self, key, body, generation=None):
+        entry = (body, etag_for(body), generation)
+        self.local.set(key, entry)
+
+        if generation is not None:
+            try:
+                self.redis.set(
+                    self._shared_key(key, generation),
+                    body,
+                    ex=current_app.config.get('RESPONSE_CACHE_SHARED_TTL_SECONDS', 600)
+                )
+            except Exception as e:
+                current_app.logger.warning(f"Shared cache write failed: {str(e)}")
+        return entry[:2]
+
+    def invalidate(self, namespace):
+        """Drop the namespace's entry and every 'namespace:...' entry, in every worker.
+
+        Shared entries are keyed by generation, so bumping it orphans them all
+        (they expire on their TTL) and makes other workers ignore their local copies.
+        """
+        self.local.pop_where(lambda key: key == namespace or key.startswith(f"{namespace}:"))
+
+        if self.redis is not None:
+            try:
+                self.redis.incr(self._generation_key(namespace))
+            except Exception as e:
+                current_app.logger.warning(f"Shared cache invalidation failed: {str(e)}")
+
+    def cached_json(self, key, build_payload):
+        """Serve build_payload() as JSON from the cache, answering 304 when the ETag matches"""
+        generation = self.generation(key.split(':', 1)[0])
+        entry = self.get(key, generation)
+        if entry is None:
+            entry = self.set(key, current_app.json.dumps(build_payload()).encode('utf-8'), generation)
+
+        body, etag = entry
+        response = current_app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = current_app.config.get(
+            'RESPONSE_CACHE_CONTROL', 'public, max-age=0, must-revalidate'
+        )
+        return response.make_conditional(request)
+
+
+def etag_for(body):
+    """Strong ETag: hash of the exact response bytes"""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+# Public catalog responses (services, offers)
+catalog_cache = ResponseCache(prefix='catalog')
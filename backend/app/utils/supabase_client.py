@@ -1,9 +1,99 @@
 from supabase import create_client, Client
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient
 from flask import current_app, g
+from app.utils.metrics import metrics
+import httpx
 import os
+import threading
 
 supabase: Client = None
 
+def count_supabase_request(request):
+    metrics.count_outbound('supabase')
+
+def instrument_session(session):
+    """Count calls made through an httpx session (idempotent)"""
+    hooks = session.event_hooks['request']
+    if count_supabase_request not in hooks:
+        hooks.append(count_supabase_request)
+
+class PooledPostgrestClient(SyncPostgrestClient):
+    """PostgREST client whose session runs on a shared transport.
+
+    Creating one only builds a header set; TLS context and keep-alive
+    connections belong to the factory's transport.
+    """
+
+    def __init__(self, base_url, transport, event_hooks, **kwargs):
+        self._transport = transport
+        self._event_hooks = event_hooks
+        super().__init__(base_url, **kwargs)
+
+    def create_session(self, base_url, headers, timeout, verify=True):
+        return SyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            follow_redirects=True,
+            transport=self._transport,
+            event_hooks=self._event_hooks
+        )
+
+class SupabaseClientFactory:
+    """Per-user (RLS) PostgREST clients sharing one connection pool"""
+
+    def __init__(self, config):
+        self.rest_url = f"{config['SUPABASE_URL'].rstrip('/')}/rest/v1"
+        self.anon_key = config['SUPABASE_KEY']
+        self.timeout = config.get('SUPABASE_HTTP_TIMEOUT', 10)
+        self.transport = httpx.HTTPTransport(
+            http2=config.get('SUPABASE_HTTP2', True),  # needs the h2 package
+            retries=config.get('SUPABASE_CONNECT_RETRIES', 1),
+            limits=httpx.Limits(
+                max_connections=config.get('SUPABASE_POOL_MAX_CONNECTIONS', 20),
+                max_keepalive_connections=config.get('SUPABASE_POOL_MAX_KEEPALIVE', 10),
+                keepalive_expiry=config.get('SUPABASE_POOL_KEEPALIVE_SECONDS', 30)
+            )
+        )
+        self.event_hooks = {'request': [self._attach_trace, count_supabase_request]}
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.clients_created = 0
+
+    def _attach_trace(self, request):
+        request.extensions['trace'] = self._trace
+
+    def _trace(self, event_name, info):
+        # httpcore reports every new TCP connection; reused keep-alive ones report nothing
+        if event_name == 'connection.connect_tcp.complete':
+            with self._lock:
+                self.connections_opened += 1
+
+    def for_user(self, access_token):
+        with self._lock:
+            self.clients_created += 1
+
+        return PooledPostgrestClient(
+            self.rest_url,
+            self.transport,
+            self.event_hooks,
+            headers={
+                'apikey': self.anon_key,
+                'Authorization': f'Bearer {access_token}'
+            },
+            timeout=self.timeout
+        )
+
+    def stats(self):
+        return {
+            'connections_opened': self.connections_opened,
+            'clients_created': self.clients_created
+        }
+
+    def close(self):
+        self.transport.close()
+
 def init_supabase(app):
     global supabase
     with app.app_context():
@@ -15,17 +105,34 @@ def init_supabase(app):
         
         supabase = create_client(supabase_url, supabase_key)
         app.supabase = supabase
+        
+        # Per-user clients authenticate with the anon key plus the user's token
+        if app.config.get('SUPABASE_KEY'):
+            factory = app.supabase_clients = SupabaseClientFactory(app.config)
+            metrics.register_counter(
+                'supabase_connections_opened_total',
+                'TCP connections opened by the shared per-user Supabase pool',
+                lambda: factory.connections_opened
+            )
+            metrics.register_counter(
+                'supabase_clients_created_total',
+                'Per-user Supabase clients created on the shared pool',
+                lambda: factory.clients_created
+            )
 
 def get_supabase() -> Client:
     if 'supabase' not in g:
         g.supabase = current_app.supabase
+        # supabase-py rebuilds its PostgREST client on auth events, so re-check once per request
+        instrument_session(g.supabase.postgrest.session)
     return g.supabase
 
-def get_user_supabase(access_token: str) -> Client:
-    """Get Supabase client with user's access token for RLS"""
-    supabase_url = current_app.config['SUPABASE_URL']
-    supabase_key = current_app.config['SUPABASE_ANON_KEY']
+def get_user_supabase(access_token: str) -> SyncPostgrestClient:
+    """PostgREST client acting as the user (RLS) on the shared connection pool.
     
-    client = create_client(supabase_url, supabase_key)
-    client.auth.set_session(access_token, None)
-    return client
+    Supports .table()/.from_() and .rpc() like the service client.
+    """
+    factory = getattr(current_app, 'supabase_clients', None)
+    if factory is None:
+        raise ValueError("SUPABASE_ANON_KEY must be set to create per-user Supabase clients")
+    return factory.for_user(access_token)
@@ -20,6 +20,28 @@ class WhatsAppService:
             print(f"WhatsApp error: {str(e)}")
             return False
     
+    def send_bulk(self, recipients, template, params=None):
+        """Send a template message to many recipients (mock implementation for development)
+        
+        A value in params written as '{field}' is replaced with that recipient's field.
+        Returns one result dict per recipient, in input order.
+        """
+        results = []
+        for recipient in recipients:
+            phone = recipient.get('phone') or ''
+            try:
+                values = [
+                    recipient[value[1:-1]] if isinstance(value, str) and len(value) > 2 and value[0] == '{' and value[-1] == '}' else value
+                    for value in params or []
+                ]
+            except KeyError as e:
+                results.append({'phone': phone, 'success': False, 'message_id': None, 'error': f'Missing recipient field: {str(e)}'})
+                continue
+            
+            success = self.send_message(phone, f"[{template}] " + " | ".join(str(value) for value in values))
+            results.append({'phone': phone, 'success': success, 'message_id': None, 'error': None if success else 'Send failed'})
+        return results
+    
     def send_booking_confirmation(self, client_name, client_phone, service_name, appointment_date, appointment_time, duration):
         """Send booking confirmation to client"""
         message = f"""🌟 Beauty Palace Booking Confirmed! 🌟
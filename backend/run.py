@@ -1,10 +1,15 @@
+"""Development entry point.
+
+The app is only built under `python run.py`: the bcrypt and image process
+pools re-import this module in every child, which must not start another
+app (scheduler, leader election, workers). WSGI servers use the factory,
+e.g. `gunicorn 'run:build_app()'`.
+"""
 from app import create_app
-from flask import jsonify
+from app.utils.supabase_client import get_supabase
+from flask import current_app, jsonify
 import os
 
-app = create_app()
-
-@app.route('/')
 def index():
     return jsonify({
         'message': 'Beauty Palace API is running!',
@@ -15,15 +20,28 @@ def index():
             'services': '/api/services',
             'reviews': '/api/reviews',
             'offers': '/api/offers',
-            'whatsapp': '/api/whatsapp'
+            'whatsapp': '/api/whatsapp',
+            'metrics': '/metrics'
         }
     })
 
-@app.route('/health')
 def health_check():
+    """Reachability of the database through PostgREST (one tiny query)"""
+    try:
+        get_supabase().table('services').select('id').limit(1).execute()
+    except Exception as e:
+        current_app.logger.error(f"Health check failed: {str(e)}")
+        return jsonify({'status': 'unhealthy', 'database': 'disconnected'}), 503
     return jsonify({'status': 'healthy', 'database': 'connected'})
 
+def build_app():
+    app = create_app()
+    app.add_url_rule('/', 'index', index)
+    app.add_url_rule('/health', 'health_check', health_check)
+    return app
+
 if __name__ == '__main__':
+    app = build_app()
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
     app.run(host='0.0.0.0', port=port, debug=debug)
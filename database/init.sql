@@ -19,6 +19,7 @@ CREATE TABLE users (
     phone VARCHAR(20) UNIQUE NOT NULL,
     password_hash VARCHAR(128),
     is_admin BOOLEAN DEFAULT FALSE,
+    whatsapp_opt_in BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -41,9 +42,31 @@ CREATE TABLE appointments (
     appointment_time TIME NOT NULL,
     status VARCHAR(20) DEFAULT 'upcoming',
     notes TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    last_reminder_lead INTEGER,
+    -- Booked length in minutes, copied from services.duration by trigger
+    duration INTEGER NOT NULL,
+    slot TSRANGE GENERATED ALWAYS AS (
+        tsrange(appointment_date + appointment_time,
+                appointment_date + appointment_time + duration * INTERVAL '1 minute')
+    ) STORED,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Two upcoming appointments never overlap, whichever worker inserts them;
+    -- violations raise SQLSTATE 23P01 and the API answers 409
+    CONSTRAINT appointments_no_overlap EXCLUDE USING gist (slot WITH &&) WHERE (status = 'upcoming')
 );
 
+-- Generated columns cannot read other tables, so the duration is filled in
+-- before the row is checked; later service edits don't move booked slots
+CREATE FUNCTION appointments_set_duration() RETURNS TRIGGER AS $$
+BEGIN
+    SELECT duration INTO NEW.duration FROM services WHERE id = NEW.service_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER appointments_set_duration BEFORE INSERT OR UPDATE OF service_id ON appointments
+    FOR EACH ROW EXECUTE FUNCTION appointments_set_duration();
+
 CREATE TABLE reviews (
     id SERIAL PRIMARY KEY,
     user_id INTEGER REFERENCES users(id),
@@ -72,6 +95,41 @@ CREATE TABLE offers (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE TABLE whatsapp_outbox (
+    id SERIAL PRIMARY KEY,
+    idempotency_key VARCHAR(200) UNIQUE NOT NULL,
+    to_phone VARCHAR(20) NOT NULL,
+    message_text TEXT,
+    template_name VARCHAR(100),
+    template_params TEXT,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_at TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP
+);
+
+CREATE TABLE whatsapp_inbound (
+    id SERIAL PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_at TIMESTAMP,
+    last_error TEXT,
+    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    processed_at TIMESTAMP
+);
+
+-- Reminder jobs (APScheduler SQLAlchemyJobStore layout; created on first start if missing)
+CREATE TABLE apscheduler_jobs (
+    id VARCHAR(191) PRIMARY KEY,
+    next_run_time DOUBLE PRECISION,
+    job_state BYTEA NOT NULL
+);
+
 -- Insert sample data
 INSERT INTO services (name, description, price, duration, image_url) VALUES
 ('Signature Haircut', 'Personalized cut and styling that complements your unique features', 60.00, 60, 'https://ik.imagekit.io/beautypalace/services/haircut.jpg'),
@@ -94,5 +152,9 @@ INSERT INTO users (name, email, phone, is_admin) VALUES
 CREATE INDEX idx_appointments_date_time ON appointments(appointment_date, appointment_time);
 CREATE INDEX idx_appointments_status ON appointments(status);
 CREATE INDEX idx_reviews_status ON reviews(status);
+CREATE INDEX idx_review_images_path ON review_images(image_path);
 CREATE INDEX idx_services_active ON services(is_active);
 CREATE INDEX idx_offers_active_valid ON offers(is_active, valid_until);
+CREATE INDEX idx_whatsapp_outbox_due ON whatsapp_outbox(status, next_attempt_at);
+CREATE INDEX idx_whatsapp_inbound_due ON whatsapp_inbound(status, next_attempt_at);
+CREATE INDEX ix_apscheduler_jobs_next_run_time ON apscheduler_jobs(next_run_time);
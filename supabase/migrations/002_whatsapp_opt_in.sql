@@ -0,0 +1,6 @@
+-- Customers must opt in before receiving WhatsApp campaign messages
+ALTER TABLE public.profiles
+    ADD COLUMN whatsapp_opt_in BOOLEAN NOT NULL DEFAULT FALSE;
+
+CREATE INDEX idx_profiles_whatsapp_opt_in ON public.profiles(whatsapp_opt_in)
+    WHERE whatsapp_opt_in = TRUE;
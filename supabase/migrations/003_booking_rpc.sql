@@ -0,0 +1,86 @@
+-- Booking and cancellation in one round trip: each function validates,
+-- writes and returns the joined rows the API needs for notifications.
+-- Called by the backend with the service key only.
+
+CREATE OR REPLACE FUNCTION public.book_appointment(
+    p_user_id UUID,
+    p_service_id UUID,
+    p_appointment_date DATE,
+    p_appointment_time TIME,
+    p_notes TEXT DEFAULT ''
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_service public.services%ROWTYPE;
+    v_profile public.profiles%ROWTYPE;
+    v_appointment public.appointments%ROWTYPE;
+BEGIN
+    SELECT * INTO v_service
+    FROM public.services
+    WHERE id = p_service_id AND is_active = TRUE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Service not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    INSERT INTO public.appointments (user_id, service_id, appointment_date, appointment_time, notes)
+    VALUES (p_user_id, p_service_id, p_appointment_date, p_appointment_time, COALESCE(p_notes, ''))
+    RETURNING * INTO v_appointment;
+
+    SELECT * INTO v_profile FROM public.profiles WHERE id = p_user_id;
+
+    RETURN jsonb_build_object(
+        'appointment', to_jsonb(v_appointment),
+        'service', to_jsonb(v_service),
+        'profile', jsonb_build_object('name', v_profile.name, 'phone', v_profile.phone)
+    );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.cancel_appointment(
+    p_appointment_id UUID,
+    p_user_id UUID
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_appointment public.appointments%ROWTYPE;
+    v_service public.services%ROWTYPE;
+    v_profile public.profiles%ROWTYPE;
+BEGIN
+    SELECT * INTO v_appointment
+    FROM public.appointments
+    WHERE id = p_appointment_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Appointment not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    -- Owner or admin only
+    IF v_appointment.user_id <> p_user_id AND NOT EXISTS (
+        SELECT 1 FROM public.profiles WHERE id = p_user_id AND is_admin = TRUE
+    ) THEN
+        RAISE EXCEPTION 'Unauthorized' USING ERRCODE = '42501';
+    END IF;
+
+    UPDATE public.appointments
+    SET status = 'cancelled'
+    WHERE id = p_appointment_id
+    RETURNING * INTO v_appointment;
+
+    SELECT * INTO v_service FROM public.services WHERE id = v_appointment.service_id;
+    SELECT * INTO v_profile FROM public.profiles WHERE id = v_appointment.user_id;
+
+    RETURN jsonb_build_object(
+        'appointment', to_jsonb(v_appointment),
+        'service', to_jsonb(v_service),
+        'profile', jsonb_build_object('name', v_profile.name, 'phone', v_profile.phone)
+    );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- The functions trust p_user_id, so only the backend (service role) may call them
+REVOKE EXECUTE ON FUNCTION public.book_appointment(UUID, UUID, DATE, TIME, TEXT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.cancel_appointment(UUID, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.book_appointment(UUID, UUID, DATE, TIME, TEXT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.cancel_appointment(UUID, UUID) TO service_role;
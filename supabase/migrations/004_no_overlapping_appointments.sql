@@ -0,0 +1,43 @@
+-- Upcoming appointments may not overlap. The exclusion constraint makes the
+-- database the single arbiter of a slot, so concurrent bookings from any
+-- number of API workers need no application-side locking; the loser gets
+-- SQLSTATE 23P01, which the API maps to 409.
+--
+-- Adding the constraint fails if upcoming appointments already overlap.
+-- Find them first with:
+--   SELECT a.id, b.id FROM public.appointments a JOIN public.appointments b
+--     ON a.id < b.id AND a.slot && b.slot
+--   WHERE a.status = 'upcoming' AND b.status = 'upcoming';
+-- (run after the slot column below exists) and cancel or move one of each pair.
+
+-- Booked length in minutes, copied from the service when the row is written
+ALTER TABLE public.appointments ADD COLUMN duration INTEGER;
+
+UPDATE public.appointments a
+SET duration = s.duration
+FROM public.services s
+WHERE s.id = a.service_id;
+
+ALTER TABLE public.appointments ALTER COLUMN duration SET NOT NULL;
+
+-- Generated columns cannot read other tables, so the duration is filled in
+-- before the row is checked; later service edits don't move booked slots
+CREATE OR REPLACE FUNCTION public.appointments_set_duration()
+RETURNS TRIGGER AS $$
+BEGIN
+    SELECT duration INTO NEW.duration FROM public.services WHERE id = NEW.service_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER appointments_set_duration BEFORE INSERT OR UPDATE OF service_id ON public.appointments
+    FOR EACH ROW EXECUTE FUNCTION public.appointments_set_duration();
+
+ALTER TABLE public.appointments ADD COLUMN slot TSRANGE GENERATED ALWAYS AS (
+    tsrange(appointment_date + appointment_time,
+            appointment_date + appointment_time + duration * INTERVAL '1 minute')
+) STORED;
+
+ALTER TABLE public.appointments
+    ADD CONSTRAINT appointments_no_overlap
+    EXCLUDE USING gist (slot WITH &&) WHERE (status = 'upcoming');